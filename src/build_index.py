@@ -0,0 +1,25 @@
+from model import *
+from controller import *
+import os
+
+def main():
+    """Build the offline search indexes over every CV in the database."""
+    data = get_data()
+    data_path = os.path.join(os.getcwd(), "data", "data")
+    text_cache = PDFTextCache()
+
+    print(f"Indexing {len(data)} CVs...")
+    index = InvertedIndex().build(data_path, data, text_cache)
+    index.save()
+    print(f"Inverted index: {len(index.postings)} tokens over {len(index.doc_lengths)} CVs -> {default_index_path}")
+
+    fuzzy_index = FuzzyVocabularyIndex().build_from_inverted_index(index)
+    fuzzy_index.save()
+    print(f"Fuzzy index: {len(fuzzy_index.deletes)} delete variants for {len(fuzzy_index.terms)} terms -> {default_fuzzy_index_path}")
+
+    suffix_array = SuffixArrayIndex().build(data_path, data, text_cache)
+    suffix_array.save()
+    print(f"Suffix array: {len(suffix_array.sa)} suffixes over {len(suffix_array.doc_ids)} CVs -> {default_suffix_array_dir}")
+
+if __name__ == "__main__":
+    main()
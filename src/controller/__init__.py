@@ -2,6 +2,16 @@ from .pdf_text import *
 from .search_algorithm import *
 from .search_result import *
 from .summary import *
+from .text_cache import *
+from .inverted_index import *
+from .suffix_array import *
+from .fuzzy_index import *
+from .search_pool import *
 from .main_controller import *
 from .trie import *
-from .aho_corasick import *
\ No newline at end of file
+from .aho_corasick import *
+from .pattern import *
+from .levenshtein import *
+from .document_tokens import *
+from .keyword_matcher import *
+from .highlight import *
\ No newline at end of file
@@ -1,14 +1,31 @@
-from collections import deque, defaultdict
+from collections import deque
+from functools import lru_cache
+from array import array
+import re
 from .trie import *
 
-class AhoCorasickSearch:
-    def __init__(self, text, keywords):
-        self.text = text.lower()
+class _CharClassTable(dict):
+    """str.translate table mapping keyword characters to their class, everything else to class 0."""
+    def __missing__(self, key):
+        self[key] = 0
+        return 0
+
+class AhoCorasickAutomaton:
+    """Aho-Corasick automaton for a keyword set, built once and reused to scan any number of texts.
+
+    The trie and failure links are only used while building: they are compiled into a dense
+    DFA (one `array` row per state, one column per character class) with every failure
+    transition resolved ahead of time, so scanning is a single table lookup per character."""
+    def __init__(self, keywords):
         self.keywords = [kw.lower() for kw in keywords]
         self.trie = Trie(self.keywords)
         self.root = self.trie.root
         self._augment_nodes(self.root)
         self._build_failure_links()
+        self._compile_tables()
+        # the object trie is no longer needed once the tables exist
+        self.trie = None
+        self.root = None
 
     def _augment_nodes(self, node):
         """Recursively augment nodes with `fail` and `outputs`."""
@@ -45,25 +62,218 @@ class AhoCorasickSearch:
                 child.outputs += child.fail.outputs
                 child.parent = current_node  # set parent for reconstruction
 
-    def ah_search_indexes(self):
-        result = defaultdict(list)
+    def _compile_tables(self):
+        """Number the states breadth-first and fill the goto table, resolving failure links."""
+        chars = sorted({char for word in self.keywords for char in word})
+        self.char_class = {char: i + 1 for i, char in enumerate(chars)}
+        self.n_classes = len(chars) + 1
 
-        for keyword in self.keywords:
-            result[keyword] = []
+        states = [self.root]
+        state_id = {id(self.root): 0}
+        queue = deque([self.root])
+        while queue:
+            node = queue.popleft()
+            for child in node.children.values():
+                state_id[id(child)] = len(states)
+                states.append(child)
+                queue.append(child)
+        self.n_states = len(states)
 
-        node = self.root
+        # goto values are pre-multiplied by n_classes, so a state is the offset of its row
+        C = self.n_classes
+        self.goto = array('i', [0]) * (self.n_states * C)
+        for sid, node in enumerate(states):
+            row = sid * C
+            for char, cls in self.char_class.items():
+                target = node
+                while target is not None and char not in target.children:
+                    target = target.fail
+                if target is not None:
+                    self.goto[row + cls] = state_id[id(target.children[char])] * C
 
-        for i, char in enumerate(self.text):
-            while node and char not in node.children:
-                node = node.fail
-            if not node:
-                node = self.root
-                continue
-            node = node.children[char]
+        # outputs of every state flattened into one array, addressed by [offset, next offset)
+        self.word_id = {}
+        for word in self.keywords:
+            self.word_id.setdefault(word, len(self.word_id))
+        self.words = list(self.word_id)
+        self.word_lengths = array('i', [len(word) for word in self.words])
+        self.out_offsets = array('i', [0])
+        self.out_words = array('i')
+        self.emits = bytearray(self.n_states * C)
+        for sid, node in enumerate(states):
             for word in node.outputs:
-                result[word].append(i - len(word) + 1)
+                self.out_words.append(self.word_id[word])
+            self.out_offsets.append(len(self.out_words))
+            self.emits[sid * C] = node.outputs != []
+
+        self.translate_table = None
+        if self.n_classes <= 256:
+            self.translate_table = _CharClassTable({ord(char): cls for char, cls in self.char_class.items()})
+
+        # a character outside every keyword sends every state back to the root, so only runs of
+        # keyword characters at least as long as the shortest keyword can contain a match
+        min_length = min((len(word) for word in self.words if word), default=1)
+        self.run_pattern = re.compile(rb"[^\x00]{%d,}" % min_length)
+        self.run_cache = {}
+        self.run_cache_size = 1 << 16
+
+        # break the parent/child reference cycles so the object trie is freed right away
+        for node in states:
+            node.__dict__.clear()
+
+    def class_codes(self, text):
+        """Map a text to its character classes, one byte per character (C-speed via str.translate)."""
+        if self.translate_table is not None:
+            return text.translate(self.translate_table).encode("latin-1")
+        get = self.char_class.get
+        return [get(char, 0) for char in text]
+
+    def scan(self, text):
+        """Return {keyword: [start indexes]} for an already lowercased text."""
+        return self._scan(self._run_hits(text))
+
+    def count(self, text):
+        """Return {keyword: number of occurrences} without collecting positions."""
+        return self._count(self._run_hits(text))
+
+    def exists(self, text):
+        """Return {keyword: whether it occurs}, stopping as soon as every keyword has been seen."""
+        return self._exists(self._run_hits(text))
+
+    def count_pages(self, pages):
+        return self._count(self._stream_hits(pages))
+
+    def exists_pages(self, pages):
+        """exists over pages, no further page is read once every keyword has been seen."""
+        return self._exists(self._stream_hits(pages))
+
+    def stream(self):
+        """Automaton fed the text chunk by chunk, see AutomatonStream."""
+        return AutomatonStream(self)
+
+    def _scan(self, run_hits):
+        found = [[] for _ in self.words]
+        word_lengths = self.word_lengths
+        for base, hits in run_hits:
+            for end, word in hits:
+                found[word].append(base + end - word_lengths[word] + 1)
+        return { keyword: found[self.word_id[keyword]] for keyword in self.keywords }
+
+    def _count(self, run_hits):
+        counts = [0] * len(self.words)
+        for base, hits in run_hits:
+            for end, word in hits:
+                counts[word] += 1
+        return { keyword: counts[self.word_id[keyword]] for keyword in self.keywords }
+
+    def _exists(self, run_hits):
+        seen = [False] * len(self.words)
+        remaining = len(self.words)
+        for base, hits in run_hits:
+            for end, word in hits:
+                if not seen[word]:
+                    seen[word] = True
+                    remaining -= 1
+            if remaining == 0:
+                break
+        return { keyword: seen[self.word_id[keyword]] for keyword in self.keywords }
+
+    def _stream_hits(self, pages):
+        stream = self.stream()
+        for page in pages:
+            yield from stream.feed(page)
+        yield from stream.finish()
+
+    def _run_hits(self, text):
+        """Yield (offset, [(end index, word id)]) for each part of the text the DFA has to run over."""
+        return self._code_hits(self.class_codes(text))
+
+    def _code_hits(self, codes):
+        if isinstance(codes, bytes):
+            # runs repeat a lot in natural text (they are mostly whole words), so their hits are memoized
+            run_cache = self.run_cache
+            for match in self.run_pattern.finditer(codes):
+                run = match.group()
+                hits = run_cache.get(run)
+                if hits is None:
+                    hits = self._scan_run(run)
+                    if len(run_cache) >= self.run_cache_size:
+                        run_cache.clear()
+                    run_cache[run] = hits
+                if hits:
+                    yield match.start(), hits
+        else:
+            yield 0, self._scan_run(codes)
+
+    def _scan_run(self, codes):
+        """Run the DFA from the root over class codes, returning (end index, word id) hits."""
+        goto = self.goto
+        emits = self.emits
+        C = self.n_classes
+        out_offsets, out_words = self.out_offsets, self.out_words
+
+        hits = []
+        row = 0
+        for i, cls in enumerate(codes):
+            row = goto[row + cls]
+            if emits[row]:
+                sid = row // C
+                for k in range(out_offsets[sid], out_offsets[sid + 1]):
+                    hits.append((i, out_words[k]))
+        return hits
+
+class AutomatonStream:
+    """Feeds an automaton a text in chunks (e.g. PDF pages). A character outside every keyword sends
+    the DFA back to the root, so the state at the end of a chunk is fully described by the trailing
+    run of keyword characters: that run is carried into the next chunk, and matches spanning a
+    chunk boundary are found exactly as in one scan of the joined text."""
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.carry = ""
+        self.offset = 0  # index of carry[0] in the whole text
+
+    def feed(self, chunk):
+        """Return (offset, hits) pairs as _run_hits does, offsets in the whole text, for the part settled so far."""
+        text = self.carry + chunk
+        codes = self.automaton.class_codes(text)
+        if isinstance(codes, bytes):
+            cut = codes.rfind(b"\x00") + 1
+        else:
+            cut = len(codes)
+            while cut > 0 and codes[cut - 1] != 0:
+                cut -= 1
+        hits = [(self.offset + base, run_hits) for base, run_hits in self.automaton._code_hits(codes[:cut])]
+        self.carry = text[cut:]
+        self.offset += cut
+        return hits
+
+    def finish(self):
+        """Hits in the run still carried at the end of the text."""
+        hits = [(self.offset + base, run_hits) for base, run_hits in self.automaton._run_hits(self.carry)]
+        self.offset += len(self.carry)
+        self.carry = ""
+        return hits
+
+@lru_cache(maxsize=32)
+def compile_automaton(keywords):
+    """Build (or reuse) the automaton for a keyword tuple; the cache lives per worker process,
+    so each worker compiles a query's keyword set once instead of once per CV."""
+    return AhoCorasickAutomaton(keywords)
+
+class AhoCorasickSearch:
+    def __init__(self, text, keywords, automaton=None):
+        self.text = text.lower()
+        self.automaton = automaton if automaton is not None else compile_automaton(tuple(keywords))
+        self.keywords = self.automaton.keywords
+
+    def ah_search_indexes(self):
+        return self.automaton.scan(self.text)
+
+    def ah_search_counts(self):
+        return self.automaton.count(self.text)
 
-        return dict(result)
+    def ah_search_exists(self):
+        return self.automaton.exists(self.text)
 
 if __name__ == "__main__":
     text = "bananas in bandana"
@@ -0,0 +1,95 @@
+from .levenshtein import *
+from .trie import Trie
+from array import array
+from bisect import bisect_left
+import re
+
+word_pattern = re.compile(r"[\w']+")
+
+class DocumentTokens:
+    """Word table of one CV, built once and shared by every keyword searched in it.
+
+    Holds the start offset of each word in text order plus the deduplicated vocabulary
+    (word -> token ordinals), so fuzzy WORD search compares each distinct word with a keyword
+    once instead of re-slicing and re-tokenizing the text after every match."""
+
+    def __init__(self, text, folded_text=None):
+        self.text = text
+        folded = folded_text if folded_text is not None else text.lower()
+        self.starts = array('I')
+        self.words = []
+        self.vocabulary = {}
+        for ordinal, match in enumerate(word_pattern.finditer(folded)):
+            word = match.group()
+            self.starts.append(match.start())
+            self.words.append(word)
+            self.vocabulary.setdefault(word, []).append(ordinal)
+        self._matching = {}
+        self._trie = None
+
+    @property
+    def vocabulary_trie(self):
+        "trie over the distinct words, built on the first TRIE lookup"
+        if self._trie is None:
+            self._trie = Trie(self.vocabulary)
+        return self._trie
+
+    def matching_words(self, keyword, threshold, use_trie=False):
+        """Distinct words within threshold of keyword, computed once per (keyword, threshold).
+        With use_trie the vocabulary trie is walked instead of comparing every word; both give the same set."""
+        key = (keyword.lower(), threshold)
+        if key not in self._matching:
+            keyword = key[0]
+            if use_trie:
+                self._matching[key] = self.vocabulary_trie.fuzzy_search(keyword, threshold)
+            else:
+                self._matching[key] = [word for word in self.vocabulary
+                                       if bounded_levenshtein(keyword, word, threshold) <= threshold]
+        return self._matching[key]
+
+    def matching_ordinals(self, keyword, threshold, use_trie=False):
+        return self.word_ordinals(self.matching_words(keyword, threshold, use_trie))
+
+    def word_ordinals(self, words):
+        """Sorted token ordinals of every occurrence of the given vocabulary words."""
+        ordinals = []
+        for word in words:
+            ordinals.extend(self.vocabulary[word])
+        ordinals.sort()
+        return ordinals
+
+    def first_match(self, keyword, threshold, search_start=0):
+        """Start offset of the first matching word at or after search_start, or -1."""
+        ordinals = self.matching_ordinals(keyword, threshold)
+        first_ordinal = bisect_left(self.starts, search_start)
+        pos = bisect_left(ordinals, first_ordinal)
+        return self.starts[ordinals[pos]] if pos < len(ordinals) else -1
+
+    def similar_word_indexes(self, keyword, threshold, use_trie=False):
+        """Same result as SearchAlgorithm.similar_search_indexes in WORD mode."""
+        return self.match_starts(self.matching_ordinals(keyword, threshold, use_trie), len(keyword))
+
+    def match_starts(self, ordinals, keyword_length):
+        """Start offsets of the matching words at the given ordinals: after each match the search resumes
+        after the next space, and stops once fewer than keyword_length characters remain."""
+        n = len(self.text)
+        m = keyword_length
+        indices = []
+        start = 0
+        for ordinal in ordinals:
+            if start > n - m:
+                break
+            index = self.starts[ordinal]
+            if index < start:
+                continue
+            indices.append(index)
+            match_end = index + len(self.words[ordinal])
+            next_space = self.text.find(' ', match_end)
+            start = next_space + 1 if next_space != -1 else n
+        return indices
+
+if __name__ == "__main__":
+    tokens = DocumentTokens("Managed the managment of Flowers, also known as flowr-beds")
+    print(tokens.matching_words("management", 2))
+    print(tokens.similar_word_indexes("flower", 1))
+    print(tokens.similar_word_indexes("flower", 1, use_trie=True))
@@ -0,0 +1,111 @@
+from .inverted_index import default_index_dir
+from .levenshtein import *
+import json
+import os
+
+default_fuzzy_index_path = os.path.join(default_index_dir, "fuzzy_index.json")
+
+def delete_variants(word, max_distance):
+    """Every string reachable from word by deleting up to max_distance characters (word included)."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for variant in frontier:
+            for i in range(len(variant)):
+                next_frontier.add(variant[:i] + variant[i + 1:])
+        next_frontier -= variants
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+class FuzzyVocabularyIndex:
+    """SymSpell-style delete index over the corpus vocabulary.
+
+    Maps delete-variants of each term's prefix to the terms, and each term to its per-CV
+    occurrence counts. Two strings within k edits always share a variant obtained with at most
+    k deletions from each (prefixes included), so a keyword is expanded to its vocabulary
+    matches with a few dictionary lookups and verified with bounded_levenshtein.
+
+    It only tells which CVs contain a similar word: the scan's WORD count skips words that follow
+    a match before the next space, which term occurrence counts cannot reproduce, so those CVs are
+    still counted by scanning."""
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms = []
+        self.term_docs = []
+        self.deletes = {}
+
+    def add_term(self, term, docs):
+        """Add a vocabulary term with its {cv_id: occurrences}."""
+        term_id = len(self.terms)
+        self.terms.append(term)
+        self.term_docs.append(docs)
+        for variant in delete_variants(term[:self.prefix_length], self.max_distance):
+            self.deletes.setdefault(variant, []).append(term_id)
+
+    def build_from_inverted_index(self, inverted_index):
+        for term, docs in inverted_index.postings.items():
+            self.add_term(term, {cv_id: len(positions) for cv_id, positions in docs.items()})
+        return self
+
+    def can_answer(self, threshold):
+        return threshold <= self.max_distance
+
+    def lookup(self, keyword, threshold):
+        """Return the vocabulary terms within threshold edits of keyword."""
+        return [self.terms[term_id] for term_id in self._lookup_ids(keyword.lower(), threshold)]
+
+    def _lookup_ids(self, keyword, threshold):
+        candidates = set()
+        for variant in delete_variants(keyword[:self.prefix_length], threshold):
+            candidates.update(self.deletes.get(variant, ()))
+
+        m = len(keyword)
+        result = []
+        for term_id in candidates:
+            term = self.terms[term_id]
+            if abs(len(term) - m) <= threshold and bounded_levenshtein(keyword, term, threshold) <= threshold:
+                result.append(term_id)
+        return result
+
+    def keyword_documents(self, keyword, threshold):
+        """Return the set of cv_ids with a word within threshold of keyword, or None if threshold is beyond the index."""
+        if not self.can_answer(threshold):
+            return None
+        documents = set()
+        for term_id in self._lookup_ids(keyword.lower(), threshold):
+            documents.update(self.term_docs[term_id])
+        return documents
+
+    def save(self, path=default_fuzzy_index_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "max_distance": self.max_distance,
+                "prefix_length": self.prefix_length,
+                "terms": self.terms,
+                "term_docs": self.term_docs,
+                "deletes": self.deletes
+            }, file)
+
+    @classmethod
+    def load(cls, path=default_fuzzy_index_path):
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        index = cls(data["max_distance"], data["prefix_length"])
+        index.terms = data["terms"]
+        index.term_docs = data["term_docs"]
+        index.deletes = data["deletes"]
+        return index
+
+if __name__ == "__main__":
+    from .inverted_index import InvertedIndex
+    inverted = InvertedIndex()
+    inverted.add_document(1, "Managed the management of presentations as a presenter")
+    inverted.add_document(2, "Manager, presentr and managment consultant")
+    fuzzy = FuzzyVocabularyIndex().build_from_inverted_index(inverted)
+    print(fuzzy.lookup("management", 2))
+    print(fuzzy.keyword_documents("presenter", 1))
@@ -0,0 +1,80 @@
+from local_enum import *
+from array import array
+from html import escape
+
+EXACT_SPAN = KeywordResult.Exact.value
+SIMILAR_SPAN = KeywordResult.Similar.value
+
+ansi_colors = { EXACT_SPAN: "\033[91m", SIMILAR_SPAN: "\033[93m" } # red, yellow
+html_colors = { EXACT_SPAN: "#c0392b", SIMILAR_SPAN: "#b9770e" }
+
+def make_spans(triplets):
+    """Pack (start, end, kind) tuples into a flat array('I'), sorted by start."""
+    spans = array('I')
+    for triplet in sorted(triplets):
+        spans.extend(triplet)
+    return spans
+
+def iter_spans(spans):
+    """Yield (start, end, kind) from a flat span array, dropping spans that overlap an earlier one."""
+    last_end = 0
+    for i in range(0, len(spans), 3):
+        start, end, kind = spans[i], spans[i + 1], spans[i + 2]
+        if start < last_end:
+            continue
+        last_end = end
+        yield start, end, kind
+
+def render_ansi(text, spans):
+    """Whole text with every span wrapped in its ANSI color, built with one join."""
+    parts = []
+    last = 0
+    for start, end, kind in iter_spans(spans):
+        parts.append(text[last:start])
+        parts.append(ansi_colors[kind] + text[start:end] + "\033[0m")
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+def render_html(text, spans, start=0, end=None):
+    """Qt rich text of text[start:end] with the spans inside it highlighted."""
+    end = len(text) if end is None else end
+    parts = []
+    last = start
+    for span_start, span_end, kind in iter_spans(spans):
+        if span_end <= start or span_start < last:
+            continue
+        if span_start >= end:
+            break
+        parts.append(escape(text[last:span_start]))
+        parts.append(f'<b style="color:{html_colors[kind]}">{escape(text[span_start:span_end])}</b>')
+        last = span_end
+    parts.append(escape(text[last:end]))
+    return "".join(parts).replace("\n", " ")
+
+def snippets(text, spans, context=40, limit=5):
+    """Rich text snippets around the first `limit` spans, windows closer than `context` merged."""
+    windows = []
+    for start, end, kind in iter_spans(spans):
+        window_start = max(0, start - context)
+        window_end = min(len(text), end + context)
+        if windows and window_start <= windows[-1][1]:
+            windows[-1][1] = window_end
+        elif len(windows) == limit:
+            break
+        else:
+            windows.append([window_start, window_end])
+
+    result = []
+    for window_start, window_end in windows:
+        snippet = render_html(text, spans, window_start, window_end)
+        prefix = "…" if window_start > 0 else ""
+        suffix = "…" if window_end < len(text) else ""
+        result.append(prefix + snippet + suffix)
+    return result
+
+if __name__ == "__main__":
+    text = "Managed the managment of Flowers, also known as flowr-beds"
+    spans = make_spans([(25, 31, EXACT_SPAN), (12, 20, SIMILAR_SPAN), (48, 53, SIMILAR_SPAN)])
+    print(render_ansi(text, spans))
+    print(snippets(text, spans, context=10))
@@ -0,0 +1,106 @@
+import json
+import os
+import re
+
+token_pattern = re.compile(r"[\w']+")
+default_index_dir = os.path.join("data", "index")
+default_index_path = os.path.join(default_index_dir, "inverted_index.json")
+
+def tokenize(text):
+    """Lowercased word tokens, using the same word definition as the Levenshtein WORD search."""
+    return token_pattern.findall(text.lower())
+
+class InvertedIndex:
+    """Positional inverted index: token -> {cv_id: [token positions]}.
+
+    Answers whole-word and phrase occurrence counts from posting lists alone, so query
+    latency depends on how common the keyword is rather than on the size of the corpus."""
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_lengths = {}
+
+    def add_document(self, cv_id, text):
+        cv_id = str(cv_id)
+        tokens = tokenize(text)
+        self.doc_lengths[cv_id] = len(tokens)
+        for pos, token in enumerate(tokens):
+            docs = self.postings.setdefault(token, {})
+            docs.setdefault(cv_id, []).append(pos)
+
+    def build(self, root_data_dir, cv_dic, text_cache):
+        for id, cv_data in cv_dic.items():
+            full_path = os.path.join(root_data_dir, cv_data["cv_path"])
+            try:
+                raw_text = text_cache.get_raw_text(full_path)
+            except Exception as e:
+                print(f"Error indexing {full_path}: {e}")
+                continue
+            self.add_document(id, raw_text)
+        return self
+
+    def contains_document(self, cv_id):
+        return str(cv_id) in self.doc_lengths
+
+    def can_answer(self, keyword):
+        """Only keywords made of whole word tokens separated by single spaces are answerable
+        from the index; anything else (e.g. "c++") must go through the scan algorithms."""
+        tokens = tokenize(keyword)
+        return bool(tokens) and " ".join(tokens) == keyword.lower().strip()
+
+    def keyword_counts(self, keyword):
+        """Return {cv_id: occurrences} of a word or phrase, counting non-overlapping matches
+        like exact_search_indexes does, or None if the keyword is not answerable."""
+        if not self.can_answer(keyword):
+            return None
+
+        tokens = tokenize(keyword)
+        first = self.postings.get(tokens[0], {})
+        if len(tokens) == 1:
+            return {cv_id: len(positions) for cv_id, positions in first.items()}
+
+        rest = []
+        for token in tokens[1:]:
+            docs = self.postings.get(token)
+            if not docs:
+                return {}
+            rest.append(docs)
+
+        result = {}
+        for cv_id, positions in first.items():
+            if any(cv_id not in docs for docs in rest):
+                continue
+            following = [set(docs[cv_id]) for docs in rest]
+            count = 0
+            next_allowed = 0
+            for pos in positions:
+                if pos < next_allowed:
+                    continue
+                if all(pos + i + 1 in following[i] for i in range(len(following))):
+                    count += 1
+                    next_allowed = pos + len(tokens)
+            if count > 0:
+                result[cv_id] = count
+        return result
+
+    def save(self, path=default_index_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"postings": self.postings, "doc_lengths": self.doc_lengths}, file)
+
+    @classmethod
+    def load(cls, path=default_index_path):
+        index = cls()
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        return index
+
+if __name__ == "__main__":
+    index = InvertedIndex()
+    index.add_document(1, "Managed a team of Java developers. Java, Python and machine learning.")
+    index.add_document(2, "JavaScript developer with machine learning and machine   learning experience")
+    print(index.keyword_counts("java"))
+    print(index.keyword_counts("machine learning"))
+    print(index.keyword_counts("c++"))
@@ -0,0 +1,102 @@
+from local_enum import *
+from .aho_corasick import compile_automaton
+from .levenshtein import *
+from functools import lru_cache
+
+class KeywordMatcher:
+    """Exact and approximate matcher for a whole keyword set, compiled once per (keywords, threshold).
+
+    Exact occurrences come from the Aho-Corasick DFA in one pass over the text. Similar occurrences
+    are only looked for on keywords without an exact hit, resolved per distinct word of the CV: a
+    length check and a str.translate count of the word's characters missing from the keyword (each one
+    costs an edit) drop most pairs, and only the rest go through bounded_levenshtein. Every (word, keyword)
+    outcome is memoized, so a word seen in an earlier CV costs dict lookups only."""
+
+    word_cache_size = 1 << 16
+
+    def __init__(self, keywords, threshold):
+        self.automaton = compile_automaton(tuple(keywords))
+        self.keywords = self.automaton.keywords
+        self.threshold = threshold
+        self.unique_keywords = list(dict.fromkeys(self.keywords))
+        self.foreign_chars = { keyword: str.maketrans("", "", keyword) for keyword in self.unique_keywords }
+        self.word_cache = {}
+
+    def word_matches(self, word, keywords):
+        """Those of `keywords` (lowercased, from this set) within threshold edits of a lowercased word."""
+        known = self.word_cache.get(word)
+        if known is None:
+            if len(self.word_cache) >= self.word_cache_size:
+                self.word_cache.clear()
+            known = self.word_cache[word] = {}
+        k = self.threshold
+        hits = []
+        for keyword in keywords:
+            hit = known.get(keyword)
+            if hit is None:
+                hit = (abs(len(keyword) - len(word)) <= k
+                       and len(word.translate(self.foreign_chars[keyword])) <= k
+                       and bounded_levenshtein(keyword, word, k) <= k)
+                known[keyword] = hit
+            if hit:
+                hits.append(keyword)
+        return hits
+
+    def similar_words(self, tokens, keywords):
+        """{keyword: [vocabulary words within threshold]} in one pass over a DocumentTokens vocabulary."""
+        found = { keyword: [] for keyword in keywords }
+        for word in tokens.vocabulary:
+            for keyword in self.word_matches(word, keywords):
+                found[keyword].append(word)
+        return found
+
+    def similar_indexes(self, tokens, keywords=None):
+        """{keyword: [start indexes]} of similar words, with the same skipping as the WORD method.
+        keywords restricts the work and the result to some (lowercased) keywords of the set."""
+        keywords = list(dict.fromkeys(keywords)) if keywords is not None else self.unique_keywords
+        if not keywords:
+            return {}
+        similar_words = self.similar_words(tokens, keywords)
+        return { keyword: tokens.match_starts(tokens.word_ordinals(similar_words[keyword]), len(keyword))
+                 for keyword in keywords }
+
+    def search(self, folded_text, tokens, mode=MatchMode.Indexes, known_exact=None, known_similar=None):
+        """Return {keyword: {"exact": [start indexes], "similar": [start indexes]}} for every keyword,
+        similar matches only for keywords without an exact one (empty otherwise).
+        With MatchMode.Count both are occurrence counts, with MatchMode.Exists booleans.
+        known_exact and known_similar are results already found elsewhere (corpus indexes, another exact
+        algorithm), keyed by lowercased keyword in the form of `mode`: the DFA pass only runs if some exact
+        result is unknown, and keywords with a known similar result are not looked up in the vocabulary."""
+        exact = dict(known_exact or {})
+        if any(keyword not in exact for keyword in self.unique_keywords):
+            if mode == MatchMode.Count:
+                scanned = self.automaton.count(folded_text)
+            elif mode == MatchMode.Exists:
+                scanned = self.automaton.exists(folded_text)
+            else:
+                scanned = self.automaton.scan(folded_text)
+            for keyword in self.unique_keywords:
+                exact.setdefault(keyword, scanned[keyword])
+        similar = dict(known_similar or {})
+        found = self.similar_indexes(tokens, [keyword for keyword in self.unique_keywords
+                                              if not exact[keyword] and keyword not in similar])
+        if mode == MatchMode.Count:
+            found = { keyword: len(indexes) for keyword, indexes in found.items() }
+        elif mode == MatchMode.Exists:
+            found = { keyword: bool(indexes) for keyword, indexes in found.items() }
+        similar.update(found)
+        none_found = { MatchMode.Count: 0, MatchMode.Exists: False }
+        return { keyword: { "exact": exact[keyword],
+                            "similar": none_found.get(mode, []) if exact[keyword] else similar[keyword] }
+                 for keyword in self.keywords }
+
+@lru_cache(maxsize=32)
+def compile_keyword_matcher(keywords, threshold):
+    """Build (or reuse) the matcher of a query inside a worker process, shared by every CV it scans."""
+    return KeywordMatcher(keywords, threshold)
+
+if __name__ == "__main__":
+    from .document_tokens import DocumentTokens
+    text = "Managed the managment of Flowers, also known as flowr-beds"
+    matcher = compile_keyword_matcher(("management", "flower", "tulip"), 2)
+    print(matcher.search(text.lower(), DocumentTokens(text)))
@@ -0,0 +1,87 @@
+def bounded_levenshtein(a, b, threshold):
+    """Levenshtein distance between a and b if it is <= threshold, otherwise threshold + 1.
+
+    Only the diagonal band of width 2k + 1 is computed, two rows of O(min(m, n)) are reused,
+    and the computation stops as soon as a whole row exceeds the threshold."""
+    k = threshold
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    m, n = len(a), len(b)
+    big = k + 1
+    if m - n > k:
+        return big
+
+    prev = [j if j <= k else big for j in range(n + 1)]
+    cur = [big] * (n + 1)
+    for i in range(1, m + 1):
+        lo = max(1, i - k)
+        hi = min(n, i + k)
+        cur[0] = i if i <= k else big
+        if lo > 1:
+            cur[lo - 1] = big
+        row_min = cur[0]
+        char = a[i - 1]
+        for j in range(lo, hi + 1):
+            value = prev[j - 1] + (char != b[j - 1])
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if cur[j - 1] + 1 < value:
+                value = cur[j - 1] + 1
+            if value > big:
+                value = big
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if hi < n:
+            cur[hi + 1] = big
+        if row_min > k:
+            return big
+        prev, cur = cur, prev
+
+    return prev[n] if prev[n] <= k else big
+
+def myers_match_ends(pattern, text, threshold):
+    """Return every index j of text where some substring ending at j is within `threshold`
+    edits of pattern (semi-global Levenshtein), using Myers' bit-vector algorithm.
+
+    One pass, O(n * ceil(m / w)); Python ints make the bit vectors as wide as the pattern."""
+    m = len(pattern)
+    if m == 0:
+        return list(range(len(text)))
+
+    peq = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+    ends = []
+
+    for j, char in enumerate(text):
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # a match may start anywhere in the text, so a zero is shifted in (no top-row penalty)
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        if score <= threshold:
+            ends.append(j)
+
+    return ends
+
+if __name__ == "__main__":
+    print(bounded_levenshtein("kitten", "sitting", 3), bounded_levenshtein("kitten", "sitting", 2))
+    print(myers_match_ends("flower", "the flowr and the flowers", 1))
@@ -4,11 +4,17 @@ from controller import *
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer
 
 global_levenshtein_threshold = 2
+# TRIE is an opt-in alternative: its per-CV trie build costs more than the WORD scan it replaces
+global_levenshtein_method = LevenshteinMethod.WORD
+
+# least time between two partial_results updates of the view, in seconds
+partial_results_interval = 0.2
 
 class SearchThread(QThread):
     search_completed = pyqtSignal(dict)
+    partial_results = pyqtSignal(dict)
     
-    def __init__(self, data_path, data, keywords, top_matches, threshold, method, algorithm):
+    def __init__(self, data_path, data, keywords, top_matches, threshold, method, algorithm, pool=None, token=None):
         super().__init__()
         self.data_path = data_path
         self.data = data
@@ -17,11 +23,20 @@ class SearchThread(QThread):
         self.threshold = threshold
         self.method = method
         self.algorithm = algorithm
+        self.pool = pool
+        self.token = token
     
     def run(self):
         res_gen = SearchResult(self.data_path, self.data, self.keywords, 
-                              self.top_matches, self.threshold, self.method, self.algorithm)
-        results = res_gen.search_result()
+                              self.top_matches, self.threshold, self.method, self.algorithm, self.pool, self.token)
+        last_emit = None
+        for results in res_gen.iter_results():
+            # the first batch is shown right away, later ones throttled so a large corpus does not flood the GUI thread
+            if results["progress"] < 1 and (last_emit is None or results["time"] - last_emit >= partial_results_interval):
+                last_emit = results["time"]
+                self.partial_results.emit(results)
+        if res_gen.cancelled():
+            return
         self.search_completed.emit(results)
 
 class MainController:
@@ -34,6 +49,17 @@ class MainController:
         self.results = {}
         self.data = data
         self.data_path = data_path
+        self.text_cache = PDFTextCache()
+        self.search_thread = None
+        self.search_token = None
+        # cancelled threads still winding down, kept referenced until they finish
+        self.stale_threads = []
+        self.summary_service = CVSummaryService(data_path, self.text_cache)
+        self.view.snippet_provider = self.cv_snippets
+        self.view.summary_provider = self.summary_service.get_summary
+        # one warm pool for the whole session instead of a new one per search
+        self.search_pool = SearchWorkerPool(data_path, data)
+        self.search_pool.warm_up()
         # self.initialize()
     
     def connect_signals(self):
@@ -44,6 +70,7 @@ class MainController:
         self.view.next_page_requested.connect(self.handle_next_page)
         self.view.summary_requested.connect(self.handle_summary_request)
         self.view.cv_requested.connect(self.handle_cv_request)
+        self.view.search_cancel_requested.connect(self.handle_cancel_search)
     
     def initialize(self):
         self.model.load_sample_data()
@@ -51,6 +78,7 @@ class MainController:
     
     def handle_search(self, keywords, algorithm: MatchingAlgorithm, top_matches):
         print(f"Controller: Searching for '{keywords}' using {algorithm}, top {top_matches} matches")
+        self.cancel_search()
         self.model.current_page = 0
         self.view.cleanup_right_panel()
         
@@ -58,13 +86,39 @@ class MainController:
         self.view.show_loading_animation()
         
         # Create and start search thread
+        self.search_token = self.search_pool.new_search()
         self.search_thread = SearchThread(
             self.data_path, self.data, keywords, top_matches, 
-            global_levenshtein_threshold, LevenshteinMethod.WORD, algorithm
+            global_levenshtein_threshold, global_levenshtein_method, algorithm, self.search_pool, self.search_token
         )
         self.search_thread.search_completed.connect(self.on_search_completed)
+        self.search_thread.partial_results.connect(self.on_partial_results)
         self.search_thread.start()
 
+    def cancel_search(self):
+        """Cancel the running search, its workers stop after their current CV and its results are dropped"""
+        if self.search_token is not None:
+            self.search_token.cancel()
+        thread = self.search_thread
+        if thread is not None and thread.isRunning():
+            thread.search_completed.disconnect(self.on_search_completed)
+            thread.partial_results.disconnect(self.on_partial_results)
+            self.stale_threads.append(thread)
+            thread.finished.connect(lambda: self.stale_threads.remove(thread))
+        self.search_thread = None
+
+    def handle_cancel_search(self):
+        """Cancel button of the loading overlay: stop the search before it showed any result"""
+        self.cancel_search()
+        self.view.dismiss_loading_overlay()
+
+    def on_partial_results(self, results):
+        """Show the leaders so far, refined by every later update until on_search_completed"""
+        self.results = results
+        self.model.set_card_result(self.results['result'])
+        self.view.show_partial_results(self.results['scanned'], self.results['cv_num'], self.results['time'])
+        self.update_view()
+
     def on_search_completed(self, results):
         self.results = results
         self.model.set_card_result(self.results['result'])
@@ -72,9 +126,14 @@ class MainController:
         self.view.setup_right_panel_content(self.results['cv_num'], self.results['time'])
         self.update_view()
     
+    def shutdown(self):
+        """Stop the worker pool when the application quits"""
+        if self.search_token is not None:
+            self.search_token.cancel()
+        self.search_pool.shutdown(wait=False)
+
     def handle_algorithm_change(self, algorithm_state):
-        algorithms = ["KMP", "Aho-Corasick", "BM"]
-        selected_algorithm = algorithms[algorithm_state]
+        selected_algorithm = self.view.algorithms[algorithm_state]
         print(f"Controller: Algorithm changed to {selected_algorithm}")
     
     def handle_previous_page(self):
@@ -92,6 +151,18 @@ class MainController:
         # Implement summary opening logic here
         self.open_file(path)
     
+    def cv_snippets(self, candidate_data):
+        """Highlighted match snippets of one result, rendered from spans only when its card is opened"""
+        full_path = os.path.join(self.data_path, candidate_data["path"])
+        try:
+            text = self.text_cache.get_raw_text(full_path)
+        except Exception as e:
+            print(f"Error reading CV for snippets: {e}")
+            return []
+        matcher = MultipleKeywordSearch(text, list(candidate_data["search_res"].keys()))
+        spans = matcher.keyword_spans(candidate_data["search_res"], global_levenshtein_threshold, global_levenshtein_method)
+        return snippets(text, spans)
+    
     def handle_cv_request(self, path):
         full_path = os.path.join(self.data_path, path)
         print(f"Controller: Opening CV PDF from {full_path}")
@@ -0,0 +1,272 @@
+from local_enum import *
+from functools import lru_cache
+
+class CompiledPattern:
+    """Shared helpers of the compiled matchers, built on their finditer."""
+    def search(self, text, start=0):
+        """Return the first match index at or after start, or -1."""
+        for index in self.finditer(text, start):
+            return index
+        return -1
+
+    def count(self, text, start=0):
+        """Number of non-overlapping matches, without collecting their positions."""
+        count = 0
+        for _ in self.finditer(text, start):
+            count += 1
+        return count
+
+    def exists(self, text, start=0):
+        """Whether the keyword occurs at all, stopping at the first hit."""
+        return self.search(text, start) != -1
+
+    def stream(self):
+        """Matcher fed the text chunk by chunk, see PatternStream."""
+        return PatternStream(self)
+
+class PatternStream:
+    """Feeds a compiled pattern a text in chunks (e.g. PDF pages) and finds the same matches as one
+    finditer over the joined text. Between chunks it keeps where the next window starts and the last
+    length - 1 characters, the only part of a chunk a match can still span."""
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.buffer = ""
+        self.base = 0   # index of buffer[0] in the whole text
+        self.start = 0  # the next match may start here, right after the last one
+
+    def feed(self, chunk):
+        """Return start indexes (in the whole text) of the matches that end in this chunk."""
+        m = self.pattern.length
+        if m == 0:
+            return []
+        buffer = self.buffer + chunk
+        matches = []
+        for index in self.pattern.finditer(buffer, self.start - self.base):
+            matches.append(self.base + index)
+            self.start = self.base + index + m
+        keep_from = max(self.start - self.base, len(buffer) - m + 1, 0)
+        self.buffer = buffer[keep_from:]
+        self.base += keep_from
+        self.start = max(self.start, self.base)
+        return matches
+
+class KMPPattern(CompiledPattern):
+    """KMP matcher compiled once for a case-folded keyword; the text passed in must already be lowercased."""
+    def __init__(self, keyword):
+        self.keyword = keyword.lower()
+        self.length = len(self.keyword)
+        self.border = self.border_func()
+
+    def border_func(self):
+        b = [0] * self.length
+        j = 0
+        i = 1
+
+        while (i < self.length):
+            if (self.keyword[j] == self.keyword[i]):
+                b[i] = j + 1
+                i += 1
+                j += 1
+            elif (j > 0):
+                j = b[j-1]
+            else:
+                b[i] = 0
+                i += 1
+        return b
+
+    def finditer(self, text, start=0):
+        """Yield start indexes of non-overlapping matches in one left-to-right pass."""
+        m = self.length
+        if m == 0:
+            return
+        keyword, b = self.keyword, self.border
+        first = keyword[0]
+        n = len(text)
+        i = start
+        j = 0
+        while i < n:
+            if j == 0:
+                # nothing matched yet: let str.find skip to the next candidate at C speed
+                i = text.find(first, i)
+                if i == -1:
+                    return
+            if text[i] == keyword[j]:
+                if j == m - 1:
+                    yield i - m + 1
+                    j = 0
+                else:
+                    j += 1
+                i += 1
+            elif j > 0:
+                j = b[j-1]
+            else:
+                i += 1
+
+    def stream(self):
+        return KMPStream(self)
+
+class KMPStream:
+    """KMP fed chunk by chunk: the automaton state (keyword characters matched so far) is carried
+    from one chunk to the next, so no character is looked at twice."""
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.offset = 0  # index of the next chunk's first character in the whole text
+        self.j = 0
+
+    def feed(self, chunk):
+        """Return start indexes (in the whole text) of the matches that end in this chunk."""
+        m = self.pattern.length
+        if m == 0:
+            return []
+        keyword, b = self.pattern.keyword, self.pattern.border
+        first = keyword[0]
+        n = len(chunk)
+        matches = []
+        i = 0
+        j = self.j
+        while i < n:
+            if j == 0:
+                i = chunk.find(first, i)
+                if i == -1:
+                    break
+            if chunk[i] == keyword[j]:
+                if j == m - 1:
+                    matches.append(self.offset + i - m + 1)
+                    j = 0
+                else:
+                    j += 1
+                i += 1
+            elif j > 0:
+                j = b[j-1]
+            else:
+                i += 1
+        self.j = j
+        self.offset += n
+        return matches
+
+class BMPattern(CompiledPattern):
+    """Boyer-Moore matcher (bad character + good suffix rules) compiled once for a case-folded keyword."""
+    def __init__(self, keyword):
+        self.keyword = keyword.lower()
+        self.length = len(self.keyword)
+        self.last = self.build_last_occur()
+        self.good_suffix = self.build_good_suffix()
+
+    def build_last_occur(self):
+        last = {}
+        for i in range(self.length):
+            last[self.keyword[i]] = i
+        return last
+
+    def build_good_suffix(self):
+        """shift[j] is the safe shift when the mismatch happens at keyword index j - 1."""
+        p = self.keyword
+        m = self.length
+        shift = [0] * (m + 1)
+        border = [0] * (m + 1)
+
+        # case 1: the matched suffix occurs elsewhere in the keyword
+        i = m
+        j = m + 1
+        border[i] = j
+        while i > 0:
+            while j <= m and p[i - 1] != p[j - 1]:
+                if shift[j] == 0:
+                    shift[j] = j - i
+                j = border[j]
+            i -= 1
+            j -= 1
+            border[i] = j
+
+        # case 2: only a prefix of the keyword matches a part of the suffix
+        j = border[0]
+        for i in range(m + 1):
+            if shift[i] == 0:
+                shift[i] = j
+            if i == j:
+                j = border[j]
+        return shift
+
+    def finditer(self, text, start=0):
+        """Yield start indexes of non-overlapping matches, resuming right after each match."""
+        m = self.length
+        if m == 0:
+            return
+        keyword, last, good_suffix = self.keyword, self.last, self.good_suffix
+        n = len(text)
+        s = start
+        while s <= n - m:
+            j = m - 1
+            while j >= 0 and keyword[j] == text[s + j]:
+                j -= 1
+            if j < 0:
+                yield s
+                s += m
+            else:
+                s += max(good_suffix[j + 1], j - last.get(text[s + j], -1))
+
+class HorspoolPattern(CompiledPattern):
+    """Boyer-Moore-Horspool: shift by the text character under the last keyword position."""
+    def __init__(self, keyword):
+        self.keyword = keyword.lower()
+        self.length = len(self.keyword)
+        self.shift = {}
+        for i in range(self.length - 1):
+            self.shift[self.keyword[i]] = self.length - 1 - i
+
+    def finditer(self, text, start=0):
+        m = self.length
+        if m == 0:
+            return
+        keyword, shift = self.keyword, self.shift
+        n = len(text)
+        s = start
+        while s <= n - m:
+            if text[s + m - 1] == keyword[m - 1] and text[s:s + m] == keyword:
+                yield s
+                s += m
+            else:
+                s += shift.get(text[s + m - 1], m)
+
+class SundayPattern(CompiledPattern):
+    """Sunday quick search: shift by the text character just past the current window."""
+    def __init__(self, keyword):
+        self.keyword = keyword.lower()
+        self.length = len(self.keyword)
+        self.shift = {}
+        for i in range(self.length):
+            self.shift[self.keyword[i]] = self.length - i
+
+    def finditer(self, text, start=0):
+        m = self.length
+        if m == 0:
+            return
+        keyword, shift = self.keyword, self.shift
+        n = len(text)
+        s = start
+        while s <= n - m:
+            if text[s:s + m] == keyword:
+                yield s
+                s += m
+            elif s + m < n:
+                s += shift.get(text[s + m], m + 1)
+            else:
+                return
+
+@lru_cache(maxsize=128)
+def compile_pattern(keyword, algo: MatchingAlgorithm):
+    """Return the compiled matcher for a keyword, shared by every CV scanned in the same worker."""
+    if algo == MatchingAlgorithm.BM:
+        return BMPattern(keyword)
+    if algo == MatchingAlgorithm.HORSPOOL:
+        return HorspoolPattern(keyword)
+    if algo == MatchingAlgorithm.SUNDAY:
+        return SundayPattern(keyword)
+    return KMPPattern(keyword)
+
+if __name__ == "__main__":
+    text = "Flowers, also known as blooms and blossoms, are the reproductive structures of flowering plants".lower()
+    print(list(compile_pattern("flower", MatchingAlgorithm.KMP).finditer(text)))
+    print(list(compile_pattern("Flower", MatchingAlgorithm.BM).finditer(text)))
+    print(list(compile_pattern("Flower", MatchingAlgorithm.HORSPOOL).finditer(text)))
+    print(list(compile_pattern("Flower", MatchingAlgorithm.SUNDAY).finditer(text)))
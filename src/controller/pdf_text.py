@@ -4,47 +4,76 @@ import math
 
 def extract_text_from_pdf(pdf_path):
     """Extracts plain text from all pages of a PDF file."""
-    doc = fitz.open(pdf_path)
-    full_text = ""
-    
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text("text") 
-        full_text += text
+    raw_lines = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            PDFExtractor.walk_lines(page, raw_lines)
+
+    return "\n".join(raw_lines).strip()
 
-    return full_text.strip()
+def clean_raw_text(text):
+    return re.sub(r'[\n\r]+', ' ', text).strip()
 
 class PDFExtractor:
     def __init__(self, pdf_path):
         self.pdf_path = pdf_path
+        # page count of the document, known once iter_pages has opened it
+        self.page_total = None
 
     def extract_raw_from_pdf(self):
         """Extracts raw text from all pages of a PDF file, replacing newlines with spaces."""
-        doc = fitz.open(self.pdf_path)
-        full_text = ""
+        return "".join(self.iter_pages())
 
-        for page in doc:
-            text = page.get_text("text")
-            full_text += text
+    def iter_pages(self, ind_text_arr=None):
+        """Yield the raw text page by page, only one page in memory at a time; joined, the pieces are
+        exactly extract_raw_from_pdf(). Whitespace at the end of a page is held back until more text
+        follows, so a newline run across a page break still becomes one space and the ends are stripped.
+        Given ind_text_arr, the lines of the indent-tagged text are collected in it from the same pass.
+        The document is closed when the pages run out or the generator is closed early."""
+        carry = ""
+        started = False
+        with fitz.open(self.pdf_path) as doc:
+            self.page_total = doc.page_count
+            for page in doc:
+                raw_lines = []
+                self.walk_lines(page, raw_lines, ind_text_arr)
+                text = carry + "\n".join(raw_lines) + "\n"
+                settled = text.rstrip()
+                carry = text[len(settled):]
+                piece = re.sub(r'[\n\r]+', ' ', settled)
+                if not started:
+                    piece = piece.lstrip()
+                if piece:
+                    started = True
+                    yield piece
+
+    def extract_texts(self):
+        """Single pass over every page's get_text("dict"): returns (raw_text, formatted_text, page_count),
+        the raw text of extract_raw_from_pdf and the layout text of pdf_pure_text without parsing twice."""
+        ind_text_arr = []
+        raw_text = "".join(self.iter_pages(ind_text_arr))
+        return raw_text, self.indent_text_to_format_text(ind_text_arr), self.page_total
+
+    @staticmethod
+    def walk_lines(page, raw_lines, ind_text_arr=None):
+        """Append each text line of a page to raw_lines (spans joined as get_text("text") does)
+        and, when given, (x0, text) to ind_text_arr for the indent-tagged text. Every text this
+        module produces comes from here, so the raw and formatted texts always agree."""
+        for block in page.get_text("dict")["blocks"]:
+            for line in block.get("lines", []):
+                spans = line.get("spans", [])
+                raw_lines.append("".join(span["text"] for span in spans))
+                if ind_text_arr is None or not spans:
+                    continue
+                x0 = spans[0]["bbox"][0]
+                text = " ".join(span["text"].strip() for span in spans).strip()
+                ind_text_arr.append((x0, text))
 
-        cleaned_text = re.sub(r'[\n\r]+', ' ', full_text)
-        
-        return cleaned_text.strip()
-    
     def extract_with_indent(self):
-        doc = fitz.open(self.pdf_path)
         result = []
-
-        for page in doc:
-            blocks = page.get_text("dict")["blocks"]
-            for block in blocks:
-                for line in block.get("lines", []):
-                    spans = line.get("spans", [])
-                    if not spans:
-                        continue
-                    x0 = spans[0]["bbox"][0]
-                    text = " ".join(span["text"].strip() for span in spans).strip()
-                    result.append((x0, text))
+        with fitz.open(self.pdf_path) as doc:
+            for page in doc:
+                self.walk_lines(page, [], result)
 
         return result
 
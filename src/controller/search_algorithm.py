@@ -1,235 +1,174 @@
 from local_enum import *
-from .aho_corasick import AhoCorasickSearch
-import re
-
+from .aho_corasick import AhoCorasickSearch, compile_automaton
+from .pattern import *
+from .levenshtein import *
+from .document_tokens import *
+from .keyword_matcher import *
+from .highlight import *
+from array import array
+from bisect import bisect_left
+import time
+
+def page_exact_counts(pages, keywords, algo: MatchingAlgorithm, mode=MatchMode.Count):
+    """Exact counts (or 1/0 presence for Exists) of keywords over a text read page by page, e.g. PDFExtractor.iter_pages().
+    The matchers only hold one page at a time, matches across page breaks are kept by their stream state,
+    and Exists stops reading pages once every keyword was found. Keys as in MultipleKeywordSearch.exact_counts"""
+    if algo == MatchingAlgorithm.AC:
+        automaton = compile_automaton(tuple(keywords))
+        pages = (page.lower() for page in pages)
+        if mode == MatchMode.Exists:
+            return { key: int(found) for key, found in automaton.exists_pages(pages).items() }
+        return automaton.count_pages(pages)
+
+    streams = { word: compile_pattern(word, algo).stream() for word in keywords }
+    counts = { word: 0 for word in keywords }
+    for page in pages:
+        page = page.lower()
+        for word, stream in streams.items():
+            if mode == MatchMode.Exists and counts[word]:
+                continue
+            counts[word] += len(stream.feed(page))
+        if mode == MatchMode.Exists and all(counts.values()):
+            break
+    if mode == MatchMode.Exists:
+        counts = { word: min(count, 1) for word, count in counts.items() }
+    return counts
 
 class SearchAlgorithm:
-    def __init__(self, text, keyword):
+    def __init__(self, text, keyword, folded_text=None, tokens=None):
         self.keyword = keyword
         self.text = text
+        self.folded_text = folded_text if folded_text is not None else text.lower()
         self.text_length = len(self.text)
         self.keyword_length = len(self.keyword)
+        self._tokens = tokens
+        # window start candidates per threshold, see window_candidates
+        self._window_candidates = {}
+        # set when a deadline stopped a similar search before it looked at the whole text
+        self.cut_short = False
+
+    @property
+    def tokens(self):
+        "word table of the text, shared when given by MultipleKeywordSearch"
+        if self._tokens is None:
+            self._tokens = DocumentTokens(self.text, self.folded_text)
+        return self._tokens
     
     def exact_search_result(self, algo: MatchingAlgorithm):
         "returns exact matching using KMP or BM, output: (<number of matches>, <whole text with highlight for matches>)"
-        indices = []
-        start = 0
-
-        while start < self.text_length:
-            if (algo == MatchingAlgorithm.KMP):
-                match_index = self.kmp_search(start)
-            elif (algo == MatchingAlgorithm.BM):
-                match_index = self.boyer_moore_search(start)
-
-            if match_index == -1:
-                break
-            indices.append(match_index)
-            start = match_index + self.keyword_length 
-
-        if not indices:
-            return (0, self.text)
-
-        result = ""
-        last_index = 0
-        for index in indices:
-            result += self.text[last_index:index]
-            result += "\033[91m" + self.text[index:index+self.keyword_length] + "\033[0m"
-            last_index = index + self.keyword_length
-
-        result += self.text[last_index:]
-        return (len(indices), result)
+        spans = self.exact_search_spans(algo)
+        return (len(spans) // 3, render_ansi(self.text, spans))
     
     def exact_search_indexes(self, algo: MatchingAlgorithm):
         "return starting indexes of exact matches"
-        indices = []
-        start = 0
-
-        while start < self.text_length:
-            if (algo == MatchingAlgorithm.KMP):
-                match_index = self.kmp_search(start)
-            elif (algo == MatchingAlgorithm.BM):
-                match_index = self.boyer_moore_search(start)
-
-            if match_index == -1:
-                break
-            indices.append(match_index)
-            start = match_index + self.keyword_length 
-
-        return indices
+        return list(compile_pattern(self.keyword, algo).finditer(self.folded_text))
+
+    def exact_search_count(self, algo: MatchingAlgorithm):
+        "return the number of exact matches without collecting their indexes"
+        return compile_pattern(self.keyword, algo).count(self.folded_text)
+
+    def exact_search_exists(self, algo: MatchingAlgorithm):
+        "return whether there is an exact match, stopping at the first one"
+        return compile_pattern(self.keyword, algo).exists(self.folded_text)
+
+    def exact_search_spans(self, algo: MatchingAlgorithm):
+        "return exact matches as flat (start, end, kind) triplets in an array('I')"
+        spans = array('I')
+        for index in self.exact_search_indexes(algo):
+            spans.extend((index, index + self.keyword_length, EXACT_SPAN))
+        return spans
     
     def similar_search_result(self, threshold, method: LevenshteinMethod):
         "returns similar matching using levenshtein, output: (<number of matches>, <whole text with highlight for matches>)"
-        result = ""
-        last_index = 0
-        start = 0
-        found = 0
-
-        while start <= self.text_length - self.keyword_length:
-            if method == LevenshteinMethod.WORD:
-                match_index = self.levenshtein_search_word(threshold, start)
-            elif method == LevenshteinMethod.WINDOW:
-                match_index = self.levenshtein_search_window(threshold, start)
-            else:
-                break
-
-            if match_index == -1:
-                break
-            found += 1
-
-            if method == LevenshteinMethod.WORD:
-                word_match = re.match(r"[\w']+", self.text[match_index:])
+        spans = self.similar_search_spans(threshold, method)
+        return (len(spans) // 3, render_ansi(self.text, spans))
+
+    def similar_search_spans(self, threshold, method: LevenshteinMethod):
+        "return similar matches as flat (start, end, kind) triplets, a word method highlights the whole matched word"
+        spans = array('I')
+        for match_index in self.similar_search_indexes(threshold, method):
+            if method in (LevenshteinMethod.WORD, LevenshteinMethod.TRIE):
+                word_match = word_pattern.match(self.text, match_index)
                 if not word_match:
                     break
-                matched_text = word_match.group()
-                match_end = match_index + len(matched_text)
-            elif method == LevenshteinMethod.WINDOW:
-                matched_text = self.text[match_index:match_index + self.keyword_length]
-                match_end = match_index + self.keyword_length
-
-            result += self.text[last_index:match_index]
-            result += "\033[93m" + matched_text + "\033[0m" # yellow
-            last_index = match_end
-
-            if method == LevenshteinMethod.WORD:
-                next_space = self.text.find(' ', match_end)
-                start = next_space + 1 if next_space != -1 else self.text_length
+                match_end = word_match.end()
             else:
-                start = last_index
+                match_end = match_index + self.keyword_length
+            spans.extend((match_index, match_end, SIMILAR_SPAN))
+        return spans
 
-        result += self.text[last_index:]
-        return (found, result)
+    def similar_search_indexes(self, threshold, method: LevenshteinMethod, deadline=None):
+        "return starting indexes of similar matches, WINDOW stops with the matches found so far at `deadline` (a time.time() value)"
+        if method in (LevenshteinMethod.WORD, LevenshteinMethod.TRIE):
+            # TRIE walks the word table's vocabulary trie instead of comparing every word, same matches
+            return self.tokens.similar_word_indexes(self.keyword, threshold, method == LevenshteinMethod.TRIE)
 
-    def similar_search_indexes(self, threshold, method: LevenshteinMethod):
-        "return starting indexes of similar matches"
-        last_index = 0
         start = 0
         indices = []
 
         while start <= self.text_length - self.keyword_length:
-            if method == LevenshteinMethod.WORD:
-                match_index = self.levenshtein_search_word(threshold, start)
-            elif method == LevenshteinMethod.WINDOW:
-                match_index = self.levenshtein_search_window(threshold, start)
+            if method == LevenshteinMethod.WINDOW:
+                match_index = self.levenshtein_search_window(threshold, start, deadline)
             else:
                 break
 
             if match_index == -1:
                 break
             indices.append(match_index)
-
-            if method == LevenshteinMethod.WORD:
-                word_match = re.match(r"[\w']+", self.text[match_index:])
-                if not word_match:
-                    break
-                matched_text = word_match.group()
-                match_end = match_index + len(matched_text)
-            elif method == LevenshteinMethod.WINDOW:
-                matched_text = self.text[match_index:match_index + self.keyword_length]
-                match_end = match_index + self.keyword_length
-
-            last_index = match_end
-
-            if method == LevenshteinMethod.WORD:
-                next_space = self.text.find(' ', match_end)
-                start = next_space + 1 if next_space != -1 else self.text_length
-            else:
-                start = last_index
+            start = match_index + self.keyword_length
 
         return indices
     
     def boyer_moore_search(self, search_start=0):
         """Return index where pattern starts in text using Boyer-Moore bad character rule, or -1 if no match."""
-        last = self.build_last_occur()
-        n = self.text_length
-        m = self.keyword_length
-        i = search_start + m - 1  
-
-        if i >= n:
-            return -1 
-
-        j = m - 1
-
-        while i < n:
-            if self.keyword[j].lower() == self.text[i].lower():
-                if j == 0:
-                    return i  
-                else:
-                    i -= 1
-                    j -= 1
-            else:
-                lo = last[self.text[i]] if self.text[i] in last else -1
-                i += m - min(j, 1 + lo)
-                j = m - 1
-
-        return -1 
+        return compile_pattern(self.keyword, MatchingAlgorithm.BM).search(self.folded_text, search_start)
     
     def build_last_occur(self):
         """Return map storing of last occurrences of each ASCII char in pattern."""
-        last = {}
-        for i in range(self.keyword_length):
-            last[self.keyword[i]] = i 
-        return last
+        return compile_pattern(self.keyword, MatchingAlgorithm.BM).last
 
     def kmp_search(self, search_start=0):
-        b = self.kmp_border_func()
-        i = search_start
-        j = 0
-        while (i < self.text_length):
-            if (self.text[i].lower() == self.keyword[j].lower()):
-                if (j == self.keyword_length-1):
-                    return i - self.keyword_length + 1
-                i += 1
-                j += 1
-            elif (j > 0):
-                j = b[j-1]
-            else:
-                i += 1
-        return -1
+        return compile_pattern(self.keyword, MatchingAlgorithm.KMP).search(self.folded_text, search_start)
 
     def kmp_border_func(self):
-        b = [0] * self.keyword_length
-        j = 0
-        i = 1
-
-        while (i < self.keyword_length):
-            if (self.keyword[j] == self.keyword[i]):
-                b[i] = j + 1
-                i += 1
-                j += 1
-            elif (j > 0):
-                j = b[j-1]
-            else:
-                b[i] = 0
-                i += 1
-        return b
+        return compile_pattern(self.keyword, MatchingAlgorithm.KMP).border
     
-    def levenshtein_search_window(self, threshold, search_start=0):
-        """Return the first index at or after search_start where the pattern matches with Levenshtein distance <= threshold."""
+    def levenshtein_search_window(self, threshold, search_start=0, deadline=None):
+        """Return the first index at or after search_start where the pattern matches with Levenshtein distance <= threshold.
+        Returns -1 as well once `deadline` has passed."""
         n = self.text_length
         m = self.keyword_length
-
-        for i in range(search_start, n - m + 1):
-            window = self.text[i:i + m]
-            dist = self.levenshtein_distance(self.keyword.lower(), window.lower())
-            if dist <= threshold:
+        if m == 0:
+            return search_start if search_start <= n else -1
+
+        # a window [i, i + m) within threshold forces the semi-global distance at its last
+        # character to be within threshold too, so only windows ending at a Myers hit are verified
+        candidates = self.window_candidates(threshold)
+        keyword = self.keyword.lower()
+        for pos in range(bisect_left(candidates, search_start), len(candidates)):
+            i = candidates[pos]
+            if i > n - m:
+                break
+            if deadline is not None and time.time() >= deadline:
+                self.cut_short = True
+                return -1
+            window = self.folded_text[i:i + m]
+            if bounded_levenshtein(keyword, window, threshold) <= threshold:
                 return i
 
         return -1
+
+    def window_candidates(self, threshold):
+        """Start indexes of windows that may match, found in one Myers bit-vector pass and kept per threshold."""
+        if threshold not in self._window_candidates:
+            m = self.keyword_length
+            ends = myers_match_ends(self.keyword.lower(), self.folded_text, threshold)
+            self._window_candidates[threshold] = [end - m + 1 for end in ends if end >= m - 1]
+        return self._window_candidates[threshold]
     
     def levenshtein_search_word(self, threshold, search_start=0):
         """Return the index in text where a word matches keyword within threshold. Search starts at char index `search_start`."""
-        text = self.text[search_start:].lower()
-        matches = list(re.finditer(r"[\w']+", text)) 
-
-        for match in matches:
-            word = match.group()
-            # print(word)
-            start_index = match.start() + search_start 
-            dist = self.levenshtein_distance(self.keyword.lower(), word)
-            if dist <= threshold:
-                return start_index
-
-        return -1
+        return self.tokens.first_match(self.keyword, threshold, search_start)
 
     def levenshtein_distance(self, a, b):
         # print(f"Comparing: '{a}' vs '{b}'")
@@ -261,56 +200,157 @@ class SearchAlgorithm:
 class MultipleKeywordSearch:
     def __init__(self, text, keywords):
         self.text = text
+        self.folded_text = text.lower()
         self.keywords = keywords
         self.n_key = len(keywords)
+        self._tokens = None
+        # set when fuzzy matching of some keyword was stopped by a deadline
+        self.cut_short = False
+
+    @property
+    def tokens(self):
+        "word table built on first fuzzy fallback and shared by all keywords"
+        if self._tokens is None:
+            self._tokens = DocumentTokens(self.text, self.folded_text)
+        return self._tokens
+
+    def fuzzy_search(self, word):
+        "single keyword search sharing this text's folded copy and word table"
+        return SearchAlgorithm(self.text, word, self.folded_text, self.tokens)
     
-    def keywords_search_result(self, lev_threshold, lev_method: LevenshteinMethod, algo: MatchingAlgorithm):
-        "Get matching results from each keyword, gets both exact and fuzzy results if exact is not found"
-        result = {}
-        if algo == MatchingAlgorithm.AC:
-            aho = AhoCorasickSearch(self.text, self.keywords)
-            aho_res = aho.ah_search_indexes()
-
-            for key, indexes in aho_res.items():
-                if len(indexes) == 0:
-                    search = SearchAlgorithm(self.text, key)
-                    fuzzy = search.similar_search_indexes(lev_threshold, lev_method)
-                    if fuzzy:
-                        result[key] = {
-                            "type": KeywordResult.Similar,
-                            "occurrence": len(fuzzy)
-                        }
-                    else:
-                        result[key] = {
-                            "type": KeywordResult.NotFound,
-                            "occurrence": 0
-                        }
-                else:
-                    result[key] =  { "type": KeywordResult.Exact,
-                                    "occurrence": len(indexes) }
-            # print(result)
+    def keywords_search_result(self, lev_threshold, lev_method: LevenshteinMethod, algo: MatchingAlgorithm, known_exact=None, known_similar=None, mode=MatchMode.Count, deadline=None):
+        """Get matching results from each keyword, gets both exact and fuzzy results if exact is not found.
+        mode is Count for occurrence counts (what the ranking uses) or Exists to stop at the first hit,
+        then every found keyword has occurrence 1. Fuzzy matching still running at `deadline` keeps what it found so far"""
+        if lev_method == LevenshteinMethod.WORD:
+            return self.matcher_search_result(lev_threshold, algo, known_exact, known_similar, mode, deadline)
+
+        if known_exact:
+            # exact (and maybe similar) counts already answered by the corpus indexes, only the rest needs scanning
+            exact_counts = dict(known_exact)
+            pending = [word for word in self.keywords if self.result_key(word, algo) not in known_exact]
+            if pending:
+                exact_counts.update(self.exact_counts(pending, algo, mode))
         else:
-            for word in self.keywords:
-                search = SearchAlgorithm(self.text, word)
-
-                exact = search.exact_search_indexes(algo)
-                if (exact and len(exact) > 0):
-                    result[word] = { "type": KeywordResult.Exact,
-                                    "occurrence": len(exact) }
-                    continue
-                
-                fuzzy = search.similar_search_indexes(lev_threshold, lev_method)
-                if (fuzzy and len(fuzzy) > 0):
-                    result[word] = { "type": KeywordResult.Similar,
-                                    "occurrence": len(fuzzy) }
-                    continue
-                
-                if (len(fuzzy) <= 0 and len(exact) <= 0):
-                    result[word] = { "type": KeywordResult.NotFound,
-                                    "occurrence": 0 }
-        
+            exact_counts = self.exact_counts(self.keywords, algo, mode)
+
+        similar_counts = {}
+        missing = []
+        for word, occurrence in exact_counts.items():
+            if occurrence > 0:
+                continue
+            if known_similar and word in known_similar:
+                similar_counts[word] = known_similar[word]
+            else:
+                missing.append(word)
+        similar_counts.update(self.fuzzy_counts(missing, lev_threshold, lev_method, deadline))
+        if mode == MatchMode.Exists:
+            exact_counts = { word: min(count, 1) for word, count in exact_counts.items() }
+            similar_counts = { word: min(count, 1) for word, count in similar_counts.items() }
+
+        result = self.build_result(exact_counts, similar_counts)
+        if known_exact:
+            # back in query order
+            keys = [self.result_key(word, algo) for word in self.keywords]
+            ordered = { key: result[key] for key in keys if key in result }
+            ordered.update(result)
+            return ordered
         return result
 
+    def matcher_search_result(self, lev_threshold, algo: MatchingAlgorithm, known_exact=None, known_similar=None, mode=MatchMode.Count, deadline=None):
+        """WORD results from the query's KeywordMatcher: exact counts from known_exact, then from `algo` for the other
+        keywords (Aho-Corasick is the matcher's own DFA pass), and similar counts of every keyword without an exact hit
+        from one pass over the vocabulary. Once `deadline` has passed no similar match is looked for"""
+        keys = { word: self.result_key(word, algo) for word in self.keywords }
+        known_exact = known_exact or {}
+        known_similar = known_similar or {}
+        exact = { word.lower(): known_exact[key] for word, key in keys.items() if key in known_exact }
+        pending = [word for word in keys if word.lower() not in exact]
+        if pending and algo != MatchingAlgorithm.AC:
+            counts = self.exact_counts(pending, algo, mode)
+            exact.update({ word.lower(): counts[word] for word in pending })
+        similar = { word.lower(): known_similar[key] for word, key in keys.items() if key in known_similar }
+        unknown_similar = [word.lower() for word in keys if word.lower() not in similar]
+        late = deadline is not None and time.time() >= deadline
+        if late:
+            similar.update({ keyword: 0 for keyword in unknown_similar })
+
+        matches = self.keyword_matcher(lev_threshold).search(self.folded_text, self.tokens, mode, exact, similar)
+        if late and any(not matches[keyword]["exact"] for keyword in unknown_similar):
+            self.cut_short = True
+        exact_counts = { key: int(matches[word.lower()]["exact"]) for word, key in keys.items() }
+        similar_counts = { key: int(matches[word.lower()]["similar"]) for word, key in keys.items() }
+        if mode == MatchMode.Exists:
+            exact_counts = { key: min(count, 1) for key, count in exact_counts.items() }
+            similar_counts = { key: min(count, 1) for key, count in similar_counts.items() }
+        return self.build_result(exact_counts, similar_counts)
+
+    def result_key(self, word, algo: MatchingAlgorithm):
+        "key of a keyword in the result dictionary, Aho-Corasick reports keywords lowercased"
+        return word.lower() if algo == MatchingAlgorithm.AC else word
+
+    def build_result(self, exact_counts, similar_counts):
+        "Exact when a keyword has exact hits, otherwise Similar or NotFound from its similar count"
+        result = {}
+        for word, occurrence in exact_counts.items():
+            if occurrence > 0:
+                result[word] = { "type": KeywordResult.Exact,
+                                "occurrence": occurrence }
+            elif similar_counts[word] > 0:
+                result[word] = { "type": KeywordResult.Similar,
+                                "occurrence": similar_counts[word] }
+            else:
+                result[word] = { "type": KeywordResult.NotFound,
+                                "occurrence": 0 }
+        return result
+
+    def keyword_matcher(self, lev_threshold):
+        "exact and approximate matcher of the whole keyword set, compiled once per worker"
+        return compile_keyword_matcher(tuple(self.keywords), lev_threshold)
+
+    def exact_counts(self, keywords, algo: MatchingAlgorithm, mode=MatchMode.Count):
+        "exact match count (or 1/0 presence for Exists) of each keyword, keyed like the result dictionary (lowercased for Aho-Corasick)"
+        if algo == MatchingAlgorithm.AC:
+            aho = AhoCorasickSearch(self.text, keywords)
+            if mode == MatchMode.Exists:
+                return { key: int(found) for key, found in aho.ah_search_exists().items() }
+            return aho.ah_search_counts()
+        counts = {}
+        for word in keywords:
+            search = SearchAlgorithm(self.text, word, self.folded_text)
+            if mode == MatchMode.Exists:
+                counts[word] = int(search.exact_search_exists(algo))
+            else:
+                counts[word] = search.exact_search_count(algo)
+        return counts
+
+    def fuzzy_counts(self, words, lev_threshold, lev_method: LevenshteinMethod, deadline=None):
+        """similar match count of every keyword without an exact hit for WINDOW and TRIE (WORD goes through
+        matcher_search_result), TRIE walks the vocabulary trie once per keyword.
+        Keywords not reached before `deadline` count 0"""
+        if words and deadline is not None and time.time() >= deadline:
+            self.cut_short = True
+            return { word: 0 for word in words }
+        counts = {}
+        for word in words:
+            search = self.fuzzy_search(word)
+            counts[word] = len(search.similar_search_indexes(lev_threshold, lev_method, deadline))
+            self.cut_short = self.cut_short or search.cut_short
+        return counts
+
+    def keyword_spans(self, keyword_dic, lev_threshold, lev_method: LevenshteinMethod, algo=MatchingAlgorithm.KMP):
+        "highlight spans of a keywords_search_result: exact matches of Exact keywords and similar matches of Similar ones"
+        triplets = []
+        for word, content in keyword_dic.items():
+            if content["type"] == KeywordResult.Exact:
+                spans = SearchAlgorithm(self.text, word, self.folded_text).exact_search_spans(algo)
+            elif content["type"] == KeywordResult.Similar:
+                spans = self.fuzzy_search(word).similar_search_spans(lev_threshold, lev_method)
+            else:
+                continue
+            triplets.extend(zip(spans[0::3], spans[1::3], spans[2::3]))
+        return make_spans(triplets)
+
     def total_match_count(self, keyword_dic):
         exact = self.exact_match_count(keyword_dic)
         similar = self.similar_match_count(keyword_dic)
@@ -0,0 +1,132 @@
+from .text_cache import *
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+
+# recycle a worker after this many tasks, PyMuPDF keeps memory it does not give back
+default_max_tasks_per_child = 200
+
+# chunks handed to each worker, enough for the pool to even out slow and fast chunks
+chunks_per_worker = 4
+# upper bound on the estimated cost (see SearchResult.cv_costs) one chunk may carry
+target_chunk_cost = 4 * 1024 * 1024
+
+# corpus metadata and caches of the current worker process, set once by init_search_worker
+_worker_state = {}
+
+def init_search_worker(root, cv_dic, cache_dir, current_search=None):
+    """Pool initializer: load what every search task needs once per worker instead of once per task."""
+    _worker_state["root"] = root
+    _worker_state["cv_dic"] = cv_dic
+    _worker_state["text_cache"] = PDFTextCache(cache_dir)
+    _worker_state["current_search"] = current_search
+
+def worker_state():
+    return _worker_state
+
+def search_cancelled(generation):
+    """True in a worker once the search `generation` was cancelled or replaced by a newer one."""
+    current = _worker_state.get("current_search")
+    return generation is not None and current is not None and current.value != generation
+
+def adaptive_chunk_size(n_items, n_workers, average_cost):
+    """Number of CVs per task: many small CVs are batched to cut IPC and scheduling overhead,
+    while large CVs get smaller chunks so no single task holds up the end of a search."""
+    by_count = n_items // (n_workers * chunks_per_worker)
+    by_cost = int(target_chunk_cost // average_cost) if average_cost > 0 else by_count
+    return max(1, min(by_count, by_cost))
+
+def schedule_chunks(tasks, costs, n_workers):
+    """Longest-job-first chunking: tasks are ordered by estimated cost, most expensive first, and cut into
+    chunks of about equal cost. The pool starts chunks in submission order, so the big CVs run first
+    (each alone in its chunk) and batches of small ones fill the workers at the end of the search."""
+    if not tasks:
+        return []
+    order = sorted(range(len(tasks)), key=lambda i: costs[i], reverse=True)
+    total_cost = sum(costs)
+    max_items = adaptive_chunk_size(len(tasks), n_workers, total_cost / len(tasks))
+    target_cost = total_cost / (n_workers * chunks_per_worker)
+
+    chunks = []
+    chunk = []
+    chunk_cost = 0
+    for i in order:
+        chunk.append(tasks[i])
+        chunk_cost += costs[i]
+        if len(chunk) >= max_items or chunk_cost >= target_cost:
+            chunks.append(chunk)
+            chunk = []
+            chunk_cost = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def _warm_up():
+    return os.getpid()
+
+class SearchToken:
+    """Cancellation token of one search. The search thread checks it between batches; workers compare
+    `generation` with the pool's shared search counter between CVs, so chunks already running stop too."""
+
+    def __init__(self, generation=None, current_search=None):
+        self.generation = generation
+        self.current_search = current_search
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        if self.current_search is not None:
+            with self.current_search.get_lock():
+                if self.current_search.value == self.generation:
+                    self.current_search.value += 1
+
+    @property
+    def cancelled(self):
+        if self._cancelled:
+            return True
+        return self.current_search is not None and self.current_search.value != self.generation
+
+class SearchWorkerPool:
+    """Long-lived process pool for searches over one corpus.
+
+    Created once (by MainController) and reused by every search: workers are started ahead of
+    the first query, receive the CV metadata once through the initializer, and keep their
+    compiled matchers and caches between searches. Tasks only carry CV ids and the query."""
+
+    def __init__(self, root, cv_dic, max_workers=None, max_tasks_per_child=default_max_tasks_per_child, cache_dir=default_cache_dir):
+        self.root = root
+        self.cv_dic = cv_dic
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # {cv id: estimated cost} for the scheduler, filled by SearchResult.cv_costs
+        self.costs = {}
+        # max_tasks_per_child needs workers started with spawn, None keeps the platform default
+        mp_context = multiprocessing.get_context("spawn" if max_tasks_per_child else None)
+        # number of the latest search, shared with the workers so they can drop cancelled chunks
+        self.current_search = mp_context.Value("Q", 0)
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                            mp_context=mp_context,
+                                            initializer=init_search_worker,
+                                            initargs=(root, cv_dic, cache_dir, self.current_search),
+                                            max_tasks_per_child=max_tasks_per_child)
+
+    def warm_up(self):
+        """Start every worker now so the first search does not pay for process startup."""
+        return [self.executor.submit(_warm_up) for _ in range(self.max_workers)]
+
+    def new_search(self):
+        """Token of a new search; the search running before it on this pool is cancelled."""
+        with self.current_search.get_lock():
+            self.current_search.value += 1
+            return SearchToken(self.current_search.value, self.current_search)
+
+    def submit(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
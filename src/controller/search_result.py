@@ -1,12 +1,98 @@
 from .search_algorithm import *
 from .pdf_text import *
 from .summary import *
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from .text_cache import *
+from .inverted_index import *
+from .suffix_array import *
+from .fuzzy_index import *
+from .search_pool import *
+from concurrent.futures import as_completed, wait
+from functools import lru_cache
+import heapq
 import os
 import time
 
+@lru_cache(maxsize=8)
+def _load_corpus_index(index_class, path, mtime):
+    return index_class.load(path)
+
+def load_corpus_index(index_class, path):
+    """Load an offline index once and keep it in memory until its files change on disk."""
+    if os.path.isdir(path):
+        mtime = max(entry.stat().st_mtime_ns for entry in os.scandir(path))
+    else:
+        mtime = os.stat(path).st_mtime_ns
+    return _load_corpus_index(index_class, path, mtime)
+
+def match_cv(root, text_cache, cv_data, query, known_exact=None, known_similar=None):
+    """Match one CV against a query (see SearchResult.query), returning ((keyword_dic, exact_match, fuzzy_match), complete);
+    complete is False when the query deadline cut fuzzy matching short. Summaries are not part of a search,
+    CVSummaryService makes them when a card asks."""
+    full_path = os.path.join(root, cv_data["cv_path"])
+    raw_text = text_cache.lookup(full_path)
+    if raw_text is None and not known_exact:
+        # not cached yet: count exact hits on each page as it is extracted instead of scanning the whole text afterwards.
+        # This saves a pass, not memory: fuzzy matching and the cache entries need the whole text
+        raw_pages = []
+        known_exact = page_exact_counts(text_cache.extract_pages(full_path, raw_pages), query["keywords"], query["scan_algo"])
+        raw_text = "".join(raw_pages)
+    elif raw_text is None:
+        raw_text = text_cache.get_raw_text(full_path)
+    matcher = MultipleKeywordSearch(raw_text, query["keywords"])
+
+    # ranking only needs occurrence counts, so no match positions are collected
+    keyword_dic = matcher.keywords_search_result(query["lev_threshold"], query["lev_method"], query["scan_algo"],
+                                                 known_exact, known_similar, MatchMode.Count, query.get("deadline"))
+    exact_match = matcher.exact_match_count(keyword_dic)
+    fuzzy_match = matcher.similar_match_count(keyword_dic)
+    return (keyword_dic, exact_match, fuzzy_match), not matcher.cut_short
+
+def cv_entry(cv_data, match):
+    """Result entry of one CV from its metadata and the output of match_cv."""
+    keyword_dic, exact_match, fuzzy_match = match
+    return {
+        "name": cv_data["first_name"] + " " + cv_data["last_name"],
+        "dob": cv_data["date_of_birth"],
+        "address": cv_data["address"],
+        "phone": cv_data["phone_number"],
+        "role": cv_data["application_role"],
+        "path": cv_data["cv_path"],
+        "total_match": exact_match + fuzzy_match,
+        "exact_match": exact_match,
+        "fuzzy_match": fuzzy_match,
+        "search_res": keyword_dic
+    }
+
+def score_cv(root, text_cache, id, cv_data, query, known_exact=None, known_similar=None):
+    match = match_cv(root, text_cache, cv_data, query, known_exact, known_similar)[0]
+    return id, cv_entry(cv_data, match)
+
+def search_chunk_task(chunk, query, generation=None):
+    """Pool task: match a chunk of (id, known_exact, known_similar) with the corpus metadata and text cache
+    loaded by the worker initializer. Only (id, match, complete, extracted) go back, the parent adds the CV metadata;
+    extracted tells that the CV's text was (re)written to the cache, so its recorded cost changed.
+    Stops between CVs once the search `generation` is cancelled or the query deadline has passed;
+    complete is False for a CV whose fuzzy matching was cut short by the deadline."""
+    state = worker_state()
+    root, text_cache, cv_dic = state["root"], state["text_cache"], state["cv_dic"]
+    deadline = query.get("deadline")
+    matches = []
+    for id, known_exact, known_similar in chunk:
+        if search_cancelled(generation) or (deadline is not None and time.time() >= deadline):
+            break
+        writes = text_cache.writes
+        match, complete = match_cv(root, text_cache, cv_dic[id], query, known_exact, known_similar)
+        matches.append((id, match, complete, text_cache.writes != writes))
+    return matches
+
+# text characters one PDF page is worth in cv_costs
+page_cost = 2000
+
+# seconds running chunks get after the deadline to hand back the CVs they finished, they stop at their next CV
+deadline_grace = 0.5
+
 class SearchResult:
-    def __init__(self, root_data_dir, cv_dic, keywords, top_n, lev_threshold, lev_method: LevenshteinMethod, match_algo: MatchingAlgorithm):
+    def __init__(self, root_data_dir, cv_dic, keywords, top_n, lev_threshold, lev_method: LevenshteinMethod, match_algo: MatchingAlgorithm, pool=None, token=None):
         self.root = root_data_dir
         self.cv_dic = cv_dic
         self.keywords = keywords
@@ -14,65 +100,215 @@ class SearchResult:
         self.lev_threshold = lev_threshold
         self.lev_method = lev_method
         self.match_algo = match_algo
-    
-    def process_cv(self, id, cv_data):
-        full_path = os.path.join(self.root, cv_data["cv_path"])
-        pdf = PDFExtractor(full_path)
-        raw_text = pdf.extract_raw_from_pdf()
-        matcher = MultipleKeywordSearch(raw_text, self.keywords)
-
-        keyword_dic = matcher.keywords_search_result(self.lev_threshold, self.lev_method, self.match_algo)
-        exact_match = matcher.exact_match_count(keyword_dic)
-        fuzzy_match = matcher.similar_match_count(keyword_dic)
-        total_match = exact_match + fuzzy_match
-
-        raw_pdf_text = pdf.pdf_pure_text()
-        sum_gen = CVSummaryGenerator(raw_pdf_text)
-        sum_dic = sum_gen.get_final_summary()
-
-        return id, {
-            "name": cv_data["first_name"] + " " + cv_data["last_name"],
-            "dob": cv_data["date_of_birth"],
-            "address": cv_data["address"],
-            "phone": cv_data["phone_number"],
-            "role": cv_data["application_role"],
-            "path": cv_data["cv_path"],
-            "total_match": total_match,
-            "exact_match": exact_match,
-            "fuzzy_match": fuzzy_match,
-            "search_res": keyword_dic,
-            "summary": sum_dic
+        self.pool = pool
+        self.token = token
+        self.text_cache = PDFTextCache()
+        self.index_path = default_index_path
+        self.suffix_array_path = default_suffix_array_dir
+        self.fuzzy_index_path = default_fuzzy_index_path
+
+    def query(self):
+        "what a worker needs to score a CV, small enough to send with every task"
+        # the scan algorithms stay as the fallback for keywords or CVs the index cannot answer
+        scan_algo = MatchingAlgorithm.KMP if self.uses_corpus_index() else self.match_algo
+        return {
+            "keywords": self.keywords,
+            "lev_threshold": self.lev_threshold,
+            "lev_method": self.lev_method,
+            "scan_algo": scan_algo
         }
+    
+    def process_cv(self, id, cv_data, known_exact=None, known_similar=None):
+        return score_cv(self.root, self.text_cache, id, cv_data, self.query(), known_exact, known_similar)
 
-    def search_result(self):
-        result = {"time": 0, "cv_num": len(self.cv_dic), "result": {}}
+    def search_result(self, deadline=None):
+        """Search the whole corpus and return the final top-N, the last snapshot of iter_results (None if cancelled).
+        With a deadline (seconds) it returns the best top-N found in that time, see iter_results."""
+        result = None
+        for result in self.iter_results(deadline):
+            pass
+        return None if self.cancelled() else result
 
-        # cv_transformed_dic = {}
-        # for key, content in self.cv_dic.items():
-        #     cv_transformed_dic[content["detail_id"]] = content
+    def iter_results(self, deadline=None):
+        """Yield the running top-N each time a batch of CVs finishes, as
+        {"time", "cv_num", "scanned", "progress", "scored", "partial", "skipped", "result"}.
+        The last snapshot covers every CV, unless the search token is cancelled: then it stops without yielding the rest.
 
+        deadline is a time budget in seconds. Once it runs out, chunks not started are dropped and running ones
+        stop at their next CV, what they return within deadline_grace still counts. The last snapshot then counts
+        CVs fully scored, partially scored (fuzzy matching cut off) and skipped, its progress is below 1 when any was skipped."""
         start = time.time()
+        deadline_time = start + deadline if deadline is not None else None
+
+        index_counts = self.corpus_keyword_counts() if self.uses_corpus_index() else None
+
+        if self.pool is not None:
+            yield from self.snapshots(self.run_on_pool(self.pool, index_counts, deadline_time), start)
+        else:
+            # one-off search (no controller): a pool just for this call, forked with the platform default
+            with SearchWorkerPool(self.root, self.cv_dic, max_tasks_per_child=None, cache_dir=self.text_cache.cache_dir) as pool:
+                yield from self.snapshots(self.run_on_pool(pool, index_counts, deadline_time), start)
 
+    def snapshots(self, batches, start):
         cv_result = {}
-        with ProcessPoolExecutor() as executor:
-            futures = [executor.submit(self.process_cv, id, cv_data) for id, cv_data in self.cv_dic.items()]
-            for future in as_completed(futures):
-                id, res = future.result()
-                cv_result[str(id)] = res
-
-        end = time.time()
-        exec_time = end - start
-
-        sorted_items = sorted(
-            cv_result.items(),
-            key=lambda item: -self.compute_priority_index(item[1])
-        )
-        top_items = sorted_items[:self.top_n]
-        sorted_result = dict(top_items)
-        result["time"] = exec_time
-        result["result"] = sorted_result
-        return result
+        partial = 0
+        snapshot = None
+        for batch, batch_partial in batches:
+            if self.cancelled():
+                return
+            cv_result.update(batch)
+            partial += batch_partial
+            snapshot = self.snapshot(cv_result, partial, start)
+            yield snapshot
+        if self.cancelled():
+            return
+        if snapshot is None:
+            # an empty corpus, or a deadline that ran out before any chunk finished
+            yield self.snapshot(cv_result, partial, start)
+
+    def snapshot(self, cv_result, partial, start):
+        cv_num = len(self.cv_dic)
+        scanned = len(cv_result)
+        return {
+            "time": time.time() - start,
+            "cv_num": cv_num,
+            "scanned": scanned,
+            "progress": 1.0 if not cv_num else scanned / cv_num,
+            "scored": scanned - partial,
+            "partial": partial,
+            "skipped": cv_num - scanned,
+            "result": self.top_results(cv_result)
+        }
+
+    def top_results(self, cv_result):
+        # same order as a stable sort on descending priority, without sorting every CV
+        top_items = heapq.nlargest(self.top_n, cv_result.items(),
+                                   key=lambda item: self.compute_priority_index(item[1]))
+        return dict(top_items)
+
+    def run_on_pool(self, pool, index_counts, deadline_time=None):
+        """Submit the corpus in chunks and yield each chunk's ({id: entry}, partially scored count) as soon as it finishes.
+        Chunks not started yet are cancelled when the search is cancelled, the deadline passes or the caller stops early."""
+        query = self.query()
+        query["deadline"] = deadline_time
+        generation = self.token.generation if self.token is not None else None
+        tasks = [(id, *self.known_counts_for(id, index_counts)) for id in self.cv_dic]
+        costs = self.cv_costs(pool)
+        futures = [pool.submit(search_chunk_task, chunk, query, generation)
+                   for chunk in schedule_chunks(tasks, costs, pool.max_workers)]
+        remaining = None if deadline_time is None else max(0, deadline_time - time.time())
+        done = set()
+        try:
+            for future in as_completed(futures, timeout=remaining):
+                if self.cancelled():
+                    return
+                done.add(future)
+                yield self.chunk_entries(pool, future.result())
+        except TimeoutError:
+            # budget spent: chunks not started are dropped, running ones stop at their next CV on their own
+            # and get deadline_grace to return what they scored
+            for future in futures:
+                future.cancel()
+            running = [future for future in futures if future not in done and not future.cancelled()]
+            wait(running, timeout=deadline_grace)
+            for future in running:
+                if self.cancelled():
+                    return
+                if future.done():
+                    yield self.chunk_entries(pool, future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def chunk_entries(self, pool, matches):
+        entries = {}
+        partial = 0
+        for id, match, complete, extracted in matches:
+            entries[str(id)] = cv_entry(self.cv_dic[id], match)
+            partial += not complete
+            if extracted:
+                pool.costs.pop(id, None)
+        return entries, partial
+
+    def cancelled(self):
+        return self.token is not None and self.token.cancelled
+
+    def cv_costs(self, pool):
+        """Relative cost of scoring each CV: its text length plus a per-page share for parsing,
+        from the metadata recorded at extraction. A CV that was never extracted is costed by its PDF size,
+        which also puts the extraction it still needs ahead of already cached CVs.
+        Recorded costs are kept in the pool for the session, so the stat records are read once rather than
+        on every search; a CV whose text a worker writes again is forgotten and re-read next time."""
+        costs = []
+        for id, cv_data in self.cv_dic.items():
+            cost = pool.costs.get(id)
+            if cost is None:
+                cost = self.recorded_cost(cv_data)
+                if cost is not None:
+                    pool.costs[id] = cost
+                else:
+                    cost = self.size_cost(cv_data)
+            costs.append(cost)
+        return costs
+
+    def recorded_cost(self, cv_data):
+        cost = self.text_cache.cost(os.path.join(self.root, cv_data["cv_path"]))
+        if cost is None:
+            return None
+        return cost["length"] + page_cost * (cost["pages"] or 0)
+
+    def size_cost(self, cv_data):
+        try:
+            return os.path.getsize(os.path.join(self.root, cv_data["cv_path"]))
+        except OSError:
+            return 1
     
+    def uses_corpus_index(self):
+        return self.match_algo in (MatchingAlgorithm.INDEX, MatchingAlgorithm.SA)
+
+    def corpus_keyword_counts(self):
+        """Answer exact keyword counts for the whole corpus from the inverted index or suffix array, without touching any PDF.
+        For the fuzzy fallback the vocabulary delete index, when available, gives the CVs with any similar word;
+        every other CV has a similar count of 0 without scanning."""
+        index_name = "Suffix array" if self.match_algo == MatchingAlgorithm.SA else "Inverted index"
+        try:
+            if self.match_algo == MatchingAlgorithm.SA:
+                index = load_corpus_index(SuffixArrayIndex, self.suffix_array_path)
+            else:
+                index = load_corpus_index(InvertedIndex, self.index_path)
+        except (OSError, ValueError) as e:
+            print(f"{index_name} unavailable, falling back to scanning: {e}")
+            return None
+
+        counts = {}
+        for word in self.keywords:
+            keyword_counts = index.keyword_counts(word)
+            if keyword_counts is not None:
+                counts[word] = keyword_counts
+
+        similar = {}
+        if self.lev_method in (LevenshteinMethod.WORD, LevenshteinMethod.TRIE):
+            try:
+                fuzzy_index = load_corpus_index(FuzzyVocabularyIndex, self.fuzzy_index_path)
+            except (OSError, ValueError) as e:
+                print(f"Fuzzy index unavailable, falling back to scanning: {e}")
+                fuzzy_index = None
+            if fuzzy_index is not None and fuzzy_index.can_answer(self.lev_threshold):
+                for word in counts:
+                    similar[word] = fuzzy_index.keyword_documents(word, self.lev_threshold)
+
+        return {"index": index, "counts": counts, "similar": similar}
+
+    def known_counts_for(self, id, index_counts):
+        """Return (known_exact, known_similar) for one CV, or (None, None) if the index does not cover it.
+        known_similar only holds the keywords with no similar word in the CV, the others are scanned."""
+        if not index_counts or not index_counts["index"].contains_document(id):
+            return None, None
+        cv_id = str(id)
+        known_exact = { word: counts.get(cv_id, 0) for word, counts in index_counts["counts"].items() }
+        known_similar = { word: 0 for word, documents in index_counts["similar"].items() if cv_id not in documents }
+        return known_exact, known_similar
+
     def compute_priority_index(self, cv_data):
         score = 0
         for entry in cv_data["search_res"].values():
@@ -109,12 +345,13 @@ if __name__ == "__main__":
     data_path = os.path.join(os.getcwd(), "data", "cv")
     res_gen = SearchResult(data_path, cv_dic, ["managed", "efficiency", "Presenter"], 1, 2, LevenshteinMethod.WORD, MatchingAlgorithm.BM)
     result = res_gen.search_result()
+    summaries = CVSummaryService(data_path)
     for key, content in result["result"].items():
         print("SEARCH RESULT")
         print(content["search_res"])
         print()
         print("SUMMARY")
-        print(content["summary"])
+        print(summaries.get_summary(content["path"]))
         print()
 
 
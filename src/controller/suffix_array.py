@@ -0,0 +1,163 @@
+from .inverted_index import default_index_dir
+from array import array
+from bisect import bisect_left, bisect_right
+import json
+import os
+
+default_suffix_array_dir = os.path.join(default_index_dir, "suffix_array")
+
+def build_suffix_array(text):
+    """Prefix-doubling (Manber-Myers) suffix array construction, O(n log^2 n)."""
+    n = len(text)
+    if n == 0:
+        return array('i')
+
+    # dense first ranks: the packed key below needs every rank <= n + 1, which code points are not
+    first_rank = {c: r for r, c in enumerate(sorted(set(text)))}
+    rank = [first_rank[c] for c in text]
+    sa = list(range(n))
+    k = 1
+    while True:
+        # pack (rank[i], rank[i + k]) into one int so a single key sort does each round
+        keys = [rank[i] * (n + 2) + (rank[i + k] + 1 if i + k < n else 0) for i in range(n)]
+        sa.sort(key=keys.__getitem__)
+
+        new_rank = [0] * n
+        for idx in range(1, n):
+            prev, cur = sa[idx - 1], sa[idx]
+            new_rank[cur] = new_rank[prev] + (keys[cur] != keys[prev])
+        rank = new_rank
+
+        if rank[sa[-1]] == n - 1:
+            break
+        k *= 2
+
+    return array('i', sa)
+
+class SuffixArrayIndex:
+    """Suffix array over the concatenated, case-folded text of every CV.
+
+    Locating a keyword is two binary searches, O(m log n); the matching suffixes are then
+    bucketed per CV and counted non-overlapping, exactly like exact_search_indexes."""
+    separator = "\x00"
+
+    def __init__(self):
+        self.text = ""
+        self.sa = array('i')
+        self.doc_starts = array('i')
+        self.doc_ids = []
+        self._doc_pos = {}
+
+    def build_from_texts(self, texts):
+        """Build from {cv_id: raw_text}."""
+        parts = []
+        offset = 0
+        self.doc_starts = array('i')
+        self.doc_ids = []
+        for cv_id, text in texts.items():
+            folded = text.lower().replace(self.separator, " ")
+            self.doc_starts.append(offset)
+            self.doc_ids.append(str(cv_id))
+            parts.append(folded)
+            offset += len(folded) + 1
+        self.text = self.separator.join(parts) + self.separator
+        self.sa = build_suffix_array(self.text)
+        self._doc_pos = {cv_id: i for i, cv_id in enumerate(self.doc_ids)}
+        return self
+
+    def build(self, root_data_dir, cv_dic, text_cache):
+        texts = {}
+        for id, cv_data in cv_dic.items():
+            full_path = os.path.join(root_data_dir, cv_data["cv_path"])
+            try:
+                texts[id] = text_cache.get_raw_text(full_path)
+            except Exception as e:
+                print(f"Error indexing {full_path}: {e}")
+        return self.build_from_texts(texts)
+
+    def contains_document(self, cv_id):
+        return str(cv_id) in self._doc_pos
+
+    def find_range(self, keyword):
+        """Return the [lo, hi) range of suffixes starting with keyword."""
+        m = len(keyword)
+        text = self.text
+        prefix = lambda i: text[i:i + m]
+        lo = bisect_left(self.sa, keyword, key=prefix)
+        hi = bisect_right(self.sa, keyword, lo=lo, key=prefix)
+        return lo, hi
+
+    def keyword_counts(self, keyword):
+        """Return {cv_id: non-overlapping occurrences} for a case-insensitive substring."""
+        keyword = keyword.lower()
+        m = len(keyword)
+        if m == 0 or self.separator in keyword:
+            return None
+
+        lo, hi = self.find_range(keyword)
+        if lo == hi:
+            return {}
+
+        result = {}
+        doc = -1
+        next_allowed = 0
+        for pos in sorted(self.sa[lo:hi]):
+            if doc == -1 or pos >= self._doc_end(doc):
+                doc = bisect_right(self.doc_starts, pos) - 1
+                next_allowed = 0
+            if pos < next_allowed:
+                continue
+            cv_id = self.doc_ids[doc]
+            result[cv_id] = result.get(cv_id, 0) + 1
+            next_allowed = pos + m
+        return result
+
+    def _doc_end(self, doc):
+        return self.doc_starts[doc + 1] if doc + 1 < len(self.doc_starts) else len(self.text)
+
+    def save(self, dir_path=default_suffix_array_dir):
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, "text.txt"), "w", encoding="utf-8", newline="") as file:
+            file.write(self.text)
+        with open(os.path.join(dir_path, "sa.bin"), "wb") as file:
+            self.sa.tofile(file)
+        with open(os.path.join(dir_path, "docs.json"), "w", encoding="utf-8") as file:
+            json.dump({"doc_starts": list(self.doc_starts), "doc_ids": self.doc_ids}, file)
+
+    @classmethod
+    def load(cls, dir_path=default_suffix_array_dir):
+        index = cls()
+        with open(os.path.join(dir_path, "text.txt"), "r", encoding="utf-8", newline="") as file:
+            index.text = file.read()
+        with open(os.path.join(dir_path, "sa.bin"), "rb") as file:
+            index.sa.frombytes(file.read())
+        with open(os.path.join(dir_path, "docs.json"), "r", encoding="utf-8") as file:
+            docs = json.load(file)
+        index.doc_starts = array('i', docs["doc_starts"])
+        index.doc_ids = docs["doc_ids"]
+        index._doc_pos = {cv_id: i for i, cv_id in enumerate(index.doc_ids)}
+        return index
+
+if __name__ == "__main__":
+    index = SuffixArrayIndex().build_from_texts({
+        1: "Java and JavaScript developer, aaaa",
+        2: "Python, java, JAVA",
+    })
+    print(index.keyword_counts("java"))
+    print(index.keyword_counts("aa"))
+
+    # short and non-ASCII corpora against KMP counts
+    import random
+    from local_enum import MatchingAlgorithm
+    from .pattern import compile_pattern
+    for alphabet in ("abc", "ab€é"):
+        for n in (1, 5, 50, 300):
+            texts = {i: "".join(random.choice(alphabet) for _ in range(n)) for i in range(3)}
+            index = SuffixArrayIndex().build_from_texts(texts)
+            assert list(index.sa) == sorted(range(len(index.text)), key=lambda i: index.text[i:])
+            for keyword in ("a", "ab", "€é", "aa", alphabet):
+                counts = index.keyword_counts(keyword)
+                for i, text in texts.items():
+                    expected = compile_pattern(keyword, MatchingAlgorithm.KMP).count(text.lower())
+                    assert counts.get(str(i), 0) == expected, (alphabet, n, keyword)
+    print("suffix array matches KMP counts")
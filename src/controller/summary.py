@@ -1,4 +1,5 @@
 from .pdf_text import *
+from .text_cache import *
 from local_enum import *
 import re
 import json, os
@@ -106,3 +107,23 @@ class CVSummaryGenerator:
         final_filtered = self.final_summary_filter(raw_filtered)
 
         return final_filtered
+
+class CVSummaryService:
+    """Summaries on demand: a CV is summarized the first time its summary is opened, not during search,
+    and the result is memoized by CV path for the rest of the session."""
+
+    def __init__(self, root, text_cache=None):
+        self.root = root
+        self.text_cache = text_cache or PDFTextCache()
+        self.summaries = {}
+
+    def get_summary(self, cv_path):
+        if cv_path not in self.summaries:
+            full_path = os.path.join(self.root, cv_path)
+            try:
+                text = self.text_cache.get_formatted_text(full_path)
+            except Exception as e:
+                print(f"Error reading CV for summary: {e}")
+                return {}
+            self.summaries[cv_path] = CVSummaryGenerator(text).get_final_summary()
+        return self.summaries[cv_path]
@@ -0,0 +1,170 @@
+from .pdf_text import *
+import hashlib
+import json
+import os
+
+default_cache_dir = os.path.join("data", "cache")
+CACHE_VERSION = 2
+
+class PDFTextCache:
+    """On-disk cache of extracted CV text, keyed by the SHA-1 of the PDF content.
+
+    A per-path stat record (mtime + size) lets unchanged files skip hashing entirely,
+    so a warm lookup is two small JSON reads instead of a full PyMuPDF parse. The same record
+    keeps the cost metadata (page count, text length) found at extraction for the scheduler.
+    Raw and formatted text are separate entries, so matching never loads the formatted text."""
+
+    def __init__(self, cache_dir=default_cache_dir):
+        self.cache_dir = cache_dir
+        self.stat_dir = os.path.join(cache_dir, "stat")
+        self.text_dir = os.path.join(cache_dir, "text")
+        # number of entries this instance wrote, lets a search worker tell which CVs it (re)extracted
+        self.writes = 0
+
+    def get_raw_text(self, pdf_path):
+        raw_text = self.lookup(pdf_path, "raw")
+        if raw_text is not None:
+            return raw_text
+        return self.extract(pdf_path)[0]
+
+    def get_formatted_text(self, pdf_path):
+        formatted_text = self.lookup(pdf_path, "formatted")
+        if formatted_text is not None:
+            return formatted_text
+        return self.extract(pdf_path)[1]
+
+    def extract(self, pdf_path):
+        """Parse the PDF once for both texts and its page count and store them."""
+        raw_text, formatted_text, pages = PDFExtractor(pdf_path).extract_texts()
+        self.store(pdf_path, raw_text, formatted_text, pages)
+        return raw_text, formatted_text
+
+    def extract_pages(self, pdf_path, raw_pages):
+        """Extract a PDF like extract, yielding the raw text page by page (see PDFExtractor.iter_pages) as the pages
+        are parsed, and appending each piece to raw_pages too. Both texts are stored once the last page was read,
+        raw_pages is then left with the joined raw text as its only piece; nothing is stored when the generator
+        is closed early. The whole document is still kept in memory, the cache entries need all of it."""
+        extractor = PDFExtractor(pdf_path)
+        ind_text_arr = []
+        for piece in extractor.iter_pages(ind_text_arr):
+            raw_pages.append(piece)
+            yield piece
+        raw_pages[:] = ["".join(raw_pages)]
+        self.store(pdf_path, raw_pages[0], extractor.indent_text_to_format_text(ind_text_arr), extractor.page_total)
+
+    def lookup(self, pdf_path, kind="raw"):
+        """Return the cached "raw" or "formatted" text of a PDF, or None if it is missing or stale."""
+        content_hash = self.content_hash(pdf_path)
+        if content_hash is None:
+            return None
+        return self._read_text(content_hash, kind)
+
+    def content_hash(self, pdf_path):
+        """Return the content hash of a PDF, reusing the recorded one while mtime and size are unchanged."""
+        try:
+            st = os.stat(pdf_path)
+        except OSError:
+            return None
+
+        stat_entry = self._fresh_stat_entry(pdf_path, st)
+        if stat_entry:
+            return stat_entry["hash"]
+
+        content_hash = self.file_hash(pdf_path)
+        self._write_json(self._stat_file(pdf_path), {
+            "mtime": st.st_mtime_ns,
+            "size": st.st_size,
+            "hash": content_hash
+        })
+        return content_hash
+
+    def cost(self, pdf_path):
+        """Return {"pages", "length"} recorded when the PDF was extracted, or None if it was not extracted
+        since it last changed. pages is None for entries extracted before page counts were recorded."""
+        try:
+            st = os.stat(pdf_path)
+        except OSError:
+            return None
+
+        stat_entry = self._fresh_stat_entry(pdf_path, st)
+        if not stat_entry:
+            return None
+        if "length" not in stat_entry:
+            # cached before costs were recorded: take the length from the cached text once
+            raw_text = self._read_text(stat_entry["hash"], "raw")
+            if raw_text is None:
+                return None
+            stat_entry["pages"] = None
+            stat_entry["length"] = len(raw_text)
+            self._write_json(self._stat_file(pdf_path), stat_entry)
+        return { "pages": stat_entry["pages"], "length": stat_entry["length"] }
+
+    def store(self, pdf_path, raw_text, formatted_text, pages=None):
+        """Write the raw and formatted text entries of a PDF. pages None keeps the page count already recorded."""
+        content_hash = self.content_hash(pdf_path)
+        if content_hash is None:
+            return
+        self.writes += 1
+        for kind, text in (("raw", raw_text), ("formatted", formatted_text)):
+            self._write_json(self._text_file(content_hash, kind), {
+                "version": CACHE_VERSION,
+                "text": text
+            })
+
+        stat_entry = self._read_json(self._stat_file(pdf_path))
+        if stat_entry and stat_entry["hash"] == content_hash:
+            if pages is not None or "pages" not in stat_entry:
+                stat_entry["pages"] = pages
+            stat_entry["length"] = len(raw_text)
+            self._write_json(self._stat_file(pdf_path), stat_entry)
+
+    def file_hash(self, pdf_path):
+        sha = hashlib.sha1()
+        with open(pdf_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 16), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def _fresh_stat_entry(self, pdf_path, st):
+        """The stat record of a path if it still matches the file's mtime and size."""
+        stat_entry = self._read_json(self._stat_file(pdf_path))
+        if stat_entry and stat_entry["mtime"] == st.st_mtime_ns and stat_entry["size"] == st.st_size:
+            return stat_entry
+        return None
+
+    def _stat_file(self, pdf_path):
+        path_key = hashlib.sha1(os.path.abspath(pdf_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.stat_dir, path_key + ".json")
+
+    def _text_file(self, content_hash, kind):
+        return os.path.join(self.text_dir, f"{content_hash}.{kind}.json")
+
+    def _read_text(self, content_hash, kind):
+        entry = self._read_json(self._text_file(content_hash, kind))
+        if not entry or entry.get("version") != CACHE_VERSION:
+            return None
+        return entry["text"]
+
+    def _read_json(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path, data):
+        """Write atomically so concurrent search workers never observe a half-written entry."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing text cache {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+if __name__ == "__main__":
+    cache = PDFTextCache()
+    print(cache.get_raw_text("test.pdf"))
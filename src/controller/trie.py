@@ -4,6 +4,7 @@ class TrieNode:
         self.value = value
         self.children = {}
         self.is_end_of_word = False
+        self.word = None
 
 class Trie:
     def __init__(self, keyword_array):
@@ -21,6 +22,49 @@ class Trie:
                         current_node.children[char] = new_node
                     current_node = current_node.children[char]
                 current_node.is_end_of_word = True
+                current_node.word = word.lower()
+
+    def fuzzy_search(self, word, max_distance):
+        """Return every word in the trie within max_distance Levenshtein edits of word.
+
+        Walks the trie carrying one DP row per level, so words sharing a prefix share the rows
+        computed for it. As in bounded_levenshtein only the diagonal band of width 2k + 1 is filled,
+        and a subtree is skipped as soon as the minimum of its row exceeds max_distance."""
+        word = word.lower()
+        k = max_distance
+        m = len(word)
+        big = k + 1
+        first_row = [j if j <= k else big for j in range(m + 1)]
+        results = []
+        stack = [(child, first_row, 1) for child in self.root.children.values()]
+        while stack:
+            node, prev_row, depth = stack.pop()
+            char = node.value
+            lo = max(1, depth - k)
+            hi = min(m, depth + k)
+            row = [big] * (m + 1)
+            if depth <= k:
+                row[0] = depth
+            row_min = row[0]
+            for j in range(lo, hi + 1):
+                value = prev_row[j - 1] + (word[j - 1] != char)
+                if prev_row[j] + 1 < value:
+                    value = prev_row[j] + 1
+                if row[j - 1] + 1 < value:
+                    value = row[j - 1] + 1
+                if value > big:
+                    value = big
+                row[j] = value
+                if value < row_min:
+                    row_min = value
+
+            if row_min > k:
+                continue
+            if node.is_end_of_word and row[m] <= k:
+                results.append(node.word)
+            for child in node.children.values():
+                stack.append((child, row, depth + 1))
+        return results
     
     def print_trie(self):
         self.trie_dfs(self.root, "")
@@ -34,3 +78,4 @@ class Trie:
 if __name__ == "__main__":
     trie = Trie(["apple", "app", "apt", "bat", "batch"])
     trie.print_trie()
+    print(trie.fuzzy_search("aple", 1))
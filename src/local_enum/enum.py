@@ -8,10 +8,20 @@ class MatchingAlgorithm(Enum):
     KMP = 1
     BM = 2
     AC = 3
+    INDEX = 4
+    SA = 5
+    HORSPOOL = 6
+    SUNDAY = 7
 
 class LevenshteinMethod(Enum):
     WORD = 1
     WINDOW = 2
+    TRIE = 3
+
+class MatchMode(Enum):
+    Indexes = 1
+    Count = 2
+    Exists = 3
 
 class KeywordResult(Enum):
     Exact = 1
@@ -14,6 +14,7 @@ def main():
     model = MainModel()
     view = MainView()
     controller = MainController(view, model, data, data_path)
+    app.aboutToQuit.connect(controller.shutdown)
     
     view.show()
     
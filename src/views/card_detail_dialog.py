@@ -12,12 +12,15 @@ class CardDetailDialog(QDialog):
     summary_requested = pyqtSignal(str)
     cv_requested = pyqtSignal(str)
     
-    def __init__(self, candidate_data, parent=None):
+    def __init__(self, candidate_data, parent=None, snippet_provider=None, summary_provider=None):
         super().__init__(parent)
         self.candidate_data = candidate_data
+        self.summary_provider = summary_provider
+        # highlighted snippets are only rendered here, when the card is opened
+        self.snippets = snippet_provider(candidate_data) if snippet_provider else []
         self.setWindowTitle("")  
         self.setModal(True)
-        self.setFixedSize(600, 500)
+        self.setFixedSize(600, 660 if self.snippets else 500)
         
         self.setWindowFlags(Qt.Dialog | Qt.FramelessWindowHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
@@ -131,6 +134,19 @@ class CardDetailDialog(QDialog):
         content_layout.addWidget(keywords_title)
         
         self.create_keywords_section(content_layout)
+
+        if self.snippets:
+            snippets_title = QLabel("Matches in Context")
+            snippets_title.setStyleSheet("""
+                QLabel {
+                    color: #495057;
+                    font-size: 18px;
+                    font-weight: 600;
+                    margin-bottom: 5px;
+                }
+            """)
+            content_layout.addWidget(snippets_title)
+            self.create_snippets_section(content_layout)
         
         layout.addWidget(content_frame)
     
@@ -182,6 +198,40 @@ class CardDetailDialog(QDialog):
         scroll_area.setWidget(keywords_widget)
         layout.addWidget(scroll_area)
     
+    def create_snippets_section(self, layout):
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        scroll_area.setMaximumHeight(140)
+        scroll_area.setStyleSheet("""
+            QScrollArea {
+                border: none;
+                background-color: #f8f9fa;
+                border-radius: 12px;
+            }
+        """)
+
+        snippets_widget = QWidget()
+        snippets_layout = QVBoxLayout(snippets_widget)
+        snippets_layout.setContentsMargins(20, 15, 20, 15)
+        snippets_layout.setSpacing(8)
+
+        for snippet in self.snippets:
+            snippet_label = QLabel(snippet)
+            snippet_label.setTextFormat(Qt.RichText)
+            snippet_label.setWordWrap(True)
+            snippet_label.setStyleSheet("""
+                QLabel {
+                    color: #495057;
+                    font-size: 12px;
+                }
+            """)
+            snippets_layout.addWidget(snippet_label)
+
+        scroll_area.setWidget(snippets_widget)
+        layout.addWidget(scroll_area)
+    
     def create_keyword_card(self, keyword_data, name, index):
         card = QFrame()
         card.setStyleSheet("""
@@ -385,5 +435,9 @@ class CardDetailDialog(QDialog):
         layout.addWidget(footer_frame)
     
     def show_cv_summary(self):
-        summary_dialog = CVSummaryDialog(self.candidate_data, self)
+        candidate_data = self.candidate_data
+        if self.summary_provider:
+            # search results carry no summary, it is made only when this button is used
+            candidate_data = dict(candidate_data, summary=self.summary_provider(candidate_data["path"]))
+        summary_dialog = CVSummaryDialog(candidate_data, self)
         summary_dialog.exec_()
\ No newline at end of file
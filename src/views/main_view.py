@@ -10,16 +10,20 @@ from .card_detail_dialog import CardDetailDialog
 from local_enum import *
 
 class MainView(QMainWindow):
+    algorithms = ["KMP", "Aho-Corasick", "BM", "Horspool", "Sunday", "Index", "Suffix Array"]
     search_requested = pyqtSignal(list, MatchingAlgorithm, int)  # keywords, algorithm, top_matches
     algorithm_changed = pyqtSignal(int)  # algorithm state
     previous_page_requested = pyqtSignal()
     next_page_requested = pyqtSignal()
     summary_requested = pyqtSignal(str)  # path
     cv_requested = pyqtSignal(str)  # path
+    search_cancel_requested = pyqtSignal()
     
     def __init__(self):
         super().__init__()
         self.toggle_state = 0
+        self.snippet_provider = None  # set by the controller, renders highlighted snippets of an opened card
+        self.summary_provider = None  # set by the controller, summary of a CV path made when first opened
         self.initUI()
         
     def initUI(self):
@@ -326,18 +330,9 @@ class MainView(QMainWindow):
         top_layout.setContentsMargins(0, 0, 0, 0)
         top_layout.setSpacing(10)
         
-        self.kmp_label = QLabel("KMP")
-        self.kmp_label.setStyleSheet("""
-            QLabel {
-                font-size: 12px;
-                font-weight: bold;
-                color: #333333;
-            }
-        """)
-        top_layout.addWidget(self.kmp_label)
-        
+        top_layout.addStretch()
         self.algorithm_toggle = QFrame()
-        self.algorithm_toggle.setFixedSize(120, 30)
+        self.algorithm_toggle.setFixedSize(40 * len(self.algorithms), 30)
         self.algorithm_toggle.setStyleSheet("""
             QFrame {
                 background-color: #cccccc;
@@ -360,16 +355,7 @@ class MainView(QMainWindow):
         
         self.algorithm_toggle.mousePressEvent = self.toggle_algorithm
         top_layout.addWidget(self.algorithm_toggle)
-        
-        self.bm_label = QLabel("BM")
-        self.bm_label.setStyleSheet("""
-            QLabel {
-                font-size: 12px;
-                font-weight: bold;
-                color: #333333;
-            }
-        """)
-        top_layout.addWidget(self.bm_label)
+        top_layout.addStretch()
         
         container_layout.addWidget(top_row)
         
@@ -379,15 +365,15 @@ class MainView(QMainWindow):
         bottom_layout.setContentsMargins(0, 0, 0, 0)
         
         bottom_layout.addStretch()
-        self.ac_label = QLabel("Aho-Corasick")
-        self.ac_label.setStyleSheet("""
+        self.algorithm_label = QLabel(self.algorithms[self.toggle_state])
+        self.algorithm_label.setStyleSheet("""
             QLabel {
                 font-size: 12px;
                 font-weight: bold;
                 color: #333333;
             }
         """)
-        bottom_layout.addWidget(self.ac_label)
+        bottom_layout.addWidget(self.algorithm_label)
         bottom_layout.addStretch()
         
         container_layout.addWidget(bottom_row)
@@ -443,14 +429,11 @@ class MainView(QMainWindow):
         self.show_error_dialog("Input Error", message)
 
     def toggle_algorithm(self, event):
-        self.toggle_state = (self.toggle_state + 1) % 3
-        
-        if self.toggle_state == 0:  # KMP
-            self.toggle_button.move(2, 2)
-        elif self.toggle_state == 1:  # Aho-Corasick
-            self.toggle_button.move(42, 2)
-        else:  # BM
-            self.toggle_button.move(82, 2)
+        self.toggle_state = (self.toggle_state + 1) % len(self.algorithms)
+        
+        # one 40px slot per entry of algorithms
+        self.toggle_button.move(2 + 40 * self.toggle_state, 2)
+        self.algorithm_label.setText(self.algorithms[self.toggle_state])
             
         self.algorithm_changed.emit(self.toggle_state)
 
@@ -526,8 +509,7 @@ class MainView(QMainWindow):
             return
         
         
-        algorithms = ["KMP", "Aho-Corasick", "BM"]
-        algorithm = algorithms[self.toggle_state]
+        algorithm = self.algorithms[self.toggle_state]
         top_matches = self.spin_box.value()
         
         algo_enum = MatchingAlgorithm.KMP
@@ -537,6 +519,14 @@ class MainView(QMainWindow):
             algo_enum = MatchingAlgorithm.BM
         elif algorithm == "Aho-Corasick":
             algo_enum = MatchingAlgorithm.AC
+        elif algorithm == "Horspool":
+            algo_enum = MatchingAlgorithm.HORSPOOL
+        elif algorithm == "Sunday":
+            algo_enum = MatchingAlgorithm.SUNDAY
+        elif algorithm == "Index":
+            algo_enum = MatchingAlgorithm.INDEX
+        elif algorithm == "Suffix Array":
+            algo_enum = MatchingAlgorithm.SA
         else:
             algo_enum = MatchingAlgorithm.KMP
         
@@ -752,7 +742,7 @@ class MainView(QMainWindow):
 
 
     def show_card_detail(self, candidate_data):
-        dialog = CardDetailDialog(candidate_data, self)
+        dialog = CardDetailDialog(candidate_data, self, self.snippet_provider, self.summary_provider)
         dialog.summary_requested.connect(self.summary_requested.emit)
         dialog.cv_requested.connect(self.cv_requested.emit)
         dialog.exec_()
@@ -762,8 +752,9 @@ class MainView(QMainWindow):
         self.next_button.setEnabled(can_next)
 
     def show_loading_animation(self):
-        self.search_button.setEnabled(False)
-        self.search_button.setText("Searching...")
+        # a search that replaces a running one may still have its overlay up
+        self.dismiss_loading_overlay()
+        # the Search button stays enabled: a new query replaces the running one
         
         self.loading_overlay = QWidget(self.main_area)
         self.loading_overlay.setStyleSheet("""
@@ -790,6 +781,28 @@ class MainView(QMainWindow):
             }
         """)
         overlay_layout.addWidget(loading_label)
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #808080;
+                color: white;
+                border: none;
+                border-radius: 12px;
+                padding: 6px 20px;
+                font-size: 12px;
+                font-weight: bold;
+                margin-top: 10px;
+            }
+            QPushButton:hover {
+                background-color: #707070;
+            }
+            QPushButton:pressed {
+                background-color: #606060;
+            }
+        """)
+        cancel_button.clicked.connect(self.search_cancel_requested.emit)
+        overlay_layout.addWidget(cancel_button, alignment=Qt.AlignCenter)
         
         self.loading_overlay.resize(self.main_area.size())
         self.loading_overlay.show()
@@ -819,6 +832,21 @@ class MainView(QMainWindow):
         self.search_button.setEnabled(True)
         self.search_button.setText("Search")
 
+    def show_partial_results(self, scanned, total, execution_time):
+        """Swap the loading overlay for the current leaders while the search keeps running"""
+        self.dismiss_loading_overlay()
+
+        if getattr(self, 'cards_layout', None) is None:
+            self.setup_right_panel_content(total, execution_time)
+        self.result_subtitle.setText(f"{scanned} of {total} CVs scanned in {execution_time:.2f}s...")
+
+    def dismiss_loading_overlay(self):
+        """Remove the loading overlay at once, without the fade out"""
+        if hasattr(self, 'loading_overlay') and self.loading_overlay:
+            if hasattr(self, 'loading_widget'):
+                self.loading_widget.stop_animation()
+            self.cleanup_loading_overlay()
+
     def cleanup_loading_overlay(self):
         if hasattr(self, 'loading_overlay') and self.loading_overlay:
             self.loading_overlay.deleteLater()